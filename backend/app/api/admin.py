@@ -0,0 +1,32 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse
+from app.core.config import settings
+from app.core.profiling import PROFILE_HEADER, get_profile_path, is_profile_authorized, list_profiles
+
+router = APIRouter()
+
+def require_profiling_access(request: Request):
+    """Hide the profile endpoints unless profiling is enabled and the caller sends the profiling token."""
+    if not settings.profiling_enabled:
+        raise HTTPException(status_code=404, detail="Profiling is not enabled")
+    if not settings.profiling_token:
+        raise HTTPException(status_code=403, detail="Set PROFILING_TOKEN to use the profile endpoints")
+    if not is_profile_authorized(request.headers.get(PROFILE_HEADER)):
+        raise HTTPException(status_code=403, detail=f"Send the profiling token in the {PROFILE_HEADER} header")
+
+@router.get("/profiles")
+async def get_profiles(request: Request):
+    """List stored request profiles, newest first."""
+    require_profiling_access(request)
+    return {"profiles": list_profiles()}
+
+@router.get("/profiles/{profile_id}")
+async def download_profile(profile_id: str, request: Request):
+    """Download a stored profile: pyinstrument HTML, or cProfile stats for snakeviz/pstats."""
+    require_profiling_access(request)
+    found = get_profile_path(profile_id)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    path, profile_format = found
+    media_type = "text/html" if profile_format == "html" else "application/octet-stream"
+    return FileResponse(path, media_type=media_type, filename=f"{profile_id}.{profile_format}")
@@ -1,9 +1,26 @@
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict, Any, Optional
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Depends, Response
+from fastapi.responses import StreamingResponse
+from typing import List, Dict, Any, Optional, Set
+from pydantic import BaseModel, ValidationError
+import asyncio
+import hashlib
 import json
-from openai import OpenAI
+import random
+import re
+import time
+import httpx
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+from openai import AsyncOpenAI, InternalServerError, RateLimitError
+from app.core import dedupe, prerank
 from app.core.config import settings
+from app.core.metrics import (
+    CACHE_LOOKUPS, UPSTREAM_ERRORS, record_stage, round_timings, start_request_timings, timed_stage
+)
+from app.core.profiling import profile_request
+from app.core.responses import ModelJSONResponse, model_json_response
+from app.core.streaming import NDJSON_MEDIA_TYPE, ndjson_event
+from app.database import get_db, chunked, insert_or_ignore, AnalysisCacheEntry, SessionLocal, ThreadpoolSession
 from app.models.reddit import RedditPost, BusinessContext
 
 router = APIRouter()
@@ -12,6 +29,11 @@ class AnalysisRequest(BaseModel):
     posts: List[RedditPost]
     business_context: BusinessContext
     analysis_type: Optional[str] = "detailed"  # "basic" or "detailed"
+    batched: bool = False  # Pack several posts into each completion request
+    include_timings: bool = False  # Add a per-stage timing breakdown to the response
+    prerank_top_n: Optional[int] = None  # Send only the N best locally ranked posts to the model; 0 sends all
+    prerank_min_score: Optional[float] = None  # Send only posts whose local score reaches this
+    collapse_duplicates: bool = True  # Analyze one post per near-duplicate group; reposts marked duplicate_of share the earlier post's analysis
 
 class AnalyzedPost(RedditPost):
     relevance_score: Optional[int] = None
@@ -19,40 +41,97 @@ class AnalyzedPost(RedditPost):
     target_audience_match: Optional[int] = None
     reasoning: Optional[str] = None
     business_opportunity: Optional[str] = None
+    local_score: Optional[float] = None  # Local TF-IDF similarity to the business context, 0-1
 
 class AnalysisResponse(BaseModel):
     analyzed_posts: List[AnalyzedPost]
     total_analyzed: int
     high_relevance_count: int
     average_relevance: float
+    cache_hits: int = 0  # Posts answered from the analysis cache
+    cache_misses: int = 0  # Posts not answered from the analysis cache
+    prefiltered: int = 0  # Uncached posts not sent to the model because of their local score
+    collapsed_duplicates: int = 0  # Posts that reused the analysis of a near-duplicate or of the earlier post they repost
+    timings: Optional[Dict[str, float]] = None  # Seconds per stage, summed over concurrent work, when requested
 
-def get_openai_client():
-    """Initialize OpenAI client."""
+_openai_client: Optional[AsyncOpenAI] = None
+
+def get_openai_client() -> AsyncOpenAI:
+    """Return the shared async OpenAI client, creating it on first use."""
+    global _openai_client
     if not settings.openai_api_key:
         raise HTTPException(status_code=500, detail="OpenAI API key not configured")
-    return OpenAI(api_key=settings.openai_api_key)
+    if _openai_client is None:
+        # Retries are handled in create_chat_completion so they can follow rate-limit headers
+        _openai_client = AsyncOpenAI(api_key=settings.openai_api_key, max_retries=0)
+    return _openai_client
 
-@router.post("/analyze", response_model=AnalysisResponse)
-async def analyze_posts(request: AnalysisRequest):
-    """Analyze Reddit posts using OpenAI for relevance scoring."""
-    try:
-        client = get_openai_client()
-        analyzed_posts = []
-        
-        # Convert business context to string
-        context_str = f"""
-        Company Type: {request.business_context.company_type}
-        Specialty: {request.business_context.specialty}
-        Blog Focus: {request.business_context.blog_focus}
-        Target Audience: {request.business_context.target_audience}
-        Interests: {', '.join(request.business_context.interests)}
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_SECONDS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+def parse_reset_duration(value: Optional[str]) -> Optional[float]:
+    """Parse OpenAI reset headers such as "20ms", "1s" or "6m0s" into seconds."""
+    if not value:
+        return None
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return sum(float(amount) * _DURATION_SECONDS[unit] for amount, unit in parts)
+
+def get_retry_delay(headers: httpx.Headers, attempt: int) -> float:
+    """Work out how long to wait before retrying, preferring the provider's own hints."""
+    hints = [parse_reset_duration(headers.get("retry-after"))]
+    if headers.get("retry-after-ms"):
+        hints.append(parse_reset_duration(f"{headers['retry-after-ms']}ms"))
+    if headers.get("x-ratelimit-remaining-requests") == "0":
+        hints.append(parse_reset_duration(headers.get("x-ratelimit-reset-requests")))
+    if headers.get("x-ratelimit-remaining-tokens") == "0":
+        hints.append(parse_reset_duration(headers.get("x-ratelimit-reset-tokens")))
+    hinted = max((h for h in hints if h), default=None)
+    
+    backoff = min(settings.openai_max_backoff, 2 ** attempt) * random.uniform(0.5, 1.0)
+    if hinted is None:
+        return backoff
+    return min(settings.openai_max_backoff, hinted + random.uniform(0, 0.25))
+
+async def create_chat_completion(client: AsyncOpenAI, **kwargs):
+    """Create a chat completion, retrying 429s and 5xx errors with backoff."""
+    for attempt in range(settings.openai_max_retries + 1):
+        try:
+            with timed_stage("openai"):
+                return await client.chat.completions.create(**kwargs)
+        except (RateLimitError, InternalServerError) as e:
+            UPSTREAM_ERRORS.labels("openai", str(e.status_code)).inc()
+            if attempt >= settings.openai_max_retries:
+                raise
+            delay = get_retry_delay(e.response.headers, attempt)
+            print(f"OpenAI returned {e.status_code}, retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+SYSTEM_PROMPT = "You are a business intelligence analyst. Analyze Reddit posts for business relevance and provide structured JSON responses."
+
+# Answer tokens reserved per post when sizing batched requests
+ANSWER_TOKENS_PER_POST = {"basic": 20, "detailed": 250}
+# Answer tokens reserved per batch for the surrounding JSON array
+BATCH_ANSWER_OVERHEAD = 100
+
+def build_context_str(business_context: BusinessContext) -> str:
+    """Convert business context to string."""
+    return f"""
+        Company Type: {business_context.company_type}
+        Specialty: {business_context.specialty}
+        Blog Focus: {business_context.blog_focus}
+        Target Audience: {business_context.target_audience}
+        Interests: {', '.join(business_context.interests)}
         """
-        
-        for post in request.posts:
-            try:
-                # Create analysis prompt based on analysis type
-                if request.analysis_type == "basic":
-                    prompt = f"""
+
+def build_prompt(post: RedditPost, context_str: str, analysis_type: Optional[str]) -> str:
+    """Create analysis prompt based on analysis type."""
+    if analysis_type == "basic":
+        return f"""
                     Analyze this Reddit post for basic relevance to our business:
                     
                     BUSINESS CONTEXT:
@@ -69,8 +148,7 @@ async def analyze_posts(request: AnalysisRequest):
                     
                     Respond ONLY with valid JSON, no other text.
                     """
-                else:
-                    prompt = f"""
+    return f"""
                     Analyze this Reddit post for relevance to our business:
                     
                     BUSINESS CONTEXT:
@@ -91,67 +169,541 @@ async def analyze_posts(request: AnalysisRequest):
                     
                     Respond ONLY with valid JSON, no other text.
                     """
-                
-                response = client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": "You are a business intelligence analyst. Analyze Reddit posts for business relevance and provide structured JSON responses."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.3,
-                    max_tokens=500
-                )
-                
-                # Parse JSON response
-                analysis_data = json.loads(response.choices[0].message.content)
-                
-                # Create analyzed post based on analysis type
-                if request.analysis_type == "basic":
-                    analyzed_post = AnalyzedPost(
-                        **post.model_dump(),
-                        relevance_score=analysis_data.get('relevance_score')
-                    )
-                else:
-                    analyzed_post = AnalyzedPost(
-                        **post.model_dump(),
-                        relevance_score=analysis_data.get('relevance_score'),
-                        content_type=analysis_data.get('content_type'),
-                        target_audience_match=analysis_data.get('target_audience_match'),
-                        reasoning=analysis_data.get('reasoning'),
-                        business_opportunity=analysis_data.get('business_opportunity')
-                    )
-                
-                analyzed_posts.append(analyzed_post)
-                
-            except Exception as e:
-                print(f"Error analyzing post {post.title}: {e}")
-                # Add post without analysis if analysis fails
-                analyzed_post = AnalyzedPost(**post.model_dump())
-                analyzed_posts.append(analyzed_post)
+
+def build_post_block(index: int, post: RedditPost) -> str:
+    """Format one post for a batched prompt, tagged with its id in the batch."""
+    return f"""
+                    POST [{index}]:
+                    Title: {post.title}
+                    Subreddit: r/{post.subreddit}
+                    Content: {post.selftext or 'No content'}
+                    Keywords: {', '.join(post.keywords)}
+                    """
+
+def build_batch_prompt(posts: List[RedditPost], context_str: str, analysis_type: Optional[str]) -> str:
+    """Create one prompt that analyzes several posts against a single copy of the business context."""
+    if analysis_type == "basic":
+        fields = """
+                    1. relevance_score: 0-100 (how relevant is this post to our business?)"""
+    else:
+        fields = """
+                    1. relevance_score: 0-100 (how relevant is this post to our business?)
+                    2. content_type: Type of content (question, discussion, news, etc.)
+                    3. target_audience_match: How well does this match our target audience?
+                    4. reasoning: Brief explanation of the relevance score
+                    5. business_opportunity: Potential business opportunity or content idea"""
+    post_blocks = "".join(build_post_block(index, post) for index, post in enumerate(posts))
+    return f"""
+                    Analyze each of these Reddit posts for relevance to our business:
+                    
+                    BUSINESS CONTEXT:
+                    {context_str}
+                    
+                    REDDIT POSTS:
+                    {post_blocks}
+                    
+                    Please provide a JSON array with one object per post. Each object must have
+                    "id" (the number in brackets after POST) and:{fields}
+                    
+                    Respond ONLY with a valid JSON array, no other text.
+                    """
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token) for budgeting batches."""
+    return len(text) // 4 + 1
+
+def get_batch_max_posts(analysis_type: Optional[str]) -> int:
+    """Posts per batch, capped so the reserved answer tokens stay within the model's completion limit."""
+    per_post_output = ANSWER_TOKENS_PER_POST.get(analysis_type, ANSWER_TOKENS_PER_POST["detailed"])
+    answer_cap = (settings.openai_max_completion_tokens - BATCH_ANSWER_OVERHEAD) // per_post_output
+    return max(1, min(settings.analysis_batch_max_posts, answer_cap))
+
+def plan_batches(posts: List[RedditPost], context_str: str, analysis_type: Optional[str]) -> List[List[int]]:
+    """Group post indexes into batches whose estimated prompt and answer fit the token budget."""
+    budget = settings.analysis_batch_token_budget
+    per_post_output = ANSWER_TOKENS_PER_POST.get(analysis_type, ANSWER_TOKENS_PER_POST["detailed"])
+    max_posts = get_batch_max_posts(analysis_type)
+    overhead = estimate_tokens(build_batch_prompt([], context_str, analysis_type))
+    
+    batches: List[List[int]] = []
+    current: List[int] = []
+    used = overhead
+    for index, post in enumerate(posts):
+        cost = estimate_tokens(build_post_block(index, post)) + per_post_output
+        if current and (used + cost > budget or len(current) >= max_posts):
+            batches.append(current)
+            current, used = [], overhead
+        current.append(index)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+def parse_batch_results(content: str, batch_size: int) -> Dict[int, Dict[str, Any]]:
+    """Map batch ids to their analysis, skipping items that are missing or malformed."""
+    data = json.loads(content)
+    if isinstance(data, dict):
+        # Some answers wrap the array, e.g. {"results": [...]}
+        data = next((value for value in data.values() if isinstance(value, list)), [])
+    
+    results = {}
+    for item in data if isinstance(data, list) else []:
+        if not isinstance(item, dict):
+            continue
+        try:
+            index = int(item.get("id"))
+        except (TypeError, ValueError):
+            continue
+        if 0 <= index < batch_size and isinstance(item.get("relevance_score"), (int, float)):
+            results[index] = {key: value for key, value in item.items() if key != "id"}
+    return results
+
+def build_unscored_post(post: RedditPost, local_score: Optional[float] = None) -> AnalyzedPost:
+    """Copy a post into an AnalyzedPost without analysis fields."""
+    return AnalyzedPost(**post.__dict__, local_score=local_score)
+
+def build_analyzed_post(
+    post: RedditPost,
+    analysis_data: Dict[str, Any],
+    analysis_type: Optional[str],
+    local_score: Optional[float] = None,
+) -> AnalyzedPost:
+    """Create analyzed post based on analysis type."""
+    # Field values straight from __dict__; model_dump would copy every post into a fresh dict first
+    if analysis_type == "basic":
+        return AnalyzedPost(
+            **post.__dict__,
+            relevance_score=analysis_data.get('relevance_score'),
+            local_score=local_score
+        )
+    return AnalyzedPost(
+        **post.__dict__,
+        local_score=local_score,
+        relevance_score=analysis_data.get('relevance_score'),
+        content_type=analysis_data.get('content_type'),
+        target_audience_match=analysis_data.get('target_audience_match'),
+        reasoning=analysis_data.get('reasoning'),
+        business_opportunity=analysis_data.get('business_opportunity')
+    )
+
+def try_build_analyzed_post(
+    post: RedditPost,
+    analysis_data: Dict[str, Any],
+    analysis_type: Optional[str],
+    local_score: Optional[float] = None,
+) -> Optional[AnalyzedPost]:
+    """Build the analyzed post for a model answer, or None if the answer does not fit AnalyzedPost."""
+    try:
+        return build_analyzed_post(post, analysis_data, analysis_type, local_score)
+    except (ValidationError, KeyError, AttributeError) as e:
+        print(f"Discarding malformed analysis of post {post.title}: {e}")
+        return None
+
+def get_context_hash(business_context: BusinessContext, analysis_type: Optional[str]) -> str:
+    """Hash everything besides the post that changes the model's answer."""
+    payload = json.dumps(
+        [business_context.model_dump(), analysis_type, settings.openai_model],
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def get_cache_key(post: RedditPost, context_hash: str) -> str:
+    """Key a post's analysis by its prompt-relevant content and the context hash."""
+    payload = json.dumps(
+        [post.reddit_id, post.title, post.subreddit, post.selftext, post.keywords, context_hash]
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def get_cached_analyses(db: Session, cache_keys: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Return unexpired cached analyses for the given keys."""
+    ttl_threshold = datetime.utcnow() - timedelta(hours=settings.analysis_cache_ttl_hours)
+    cached = {}
+    for chunk in chunked(list(dict.fromkeys(cache_keys))):
+        rows = db.query(AnalysisCacheEntry.cache_key, AnalysisCacheEntry.result).filter(
+            AnalysisCacheEntry.cache_key.in_(chunk),
+            AnalysisCacheEntry.created_at >= ttl_threshold,
+        )
+        cached.update({cache_key: json.loads(result) for cache_key, result in rows})
+    return cached
+
+def store_cached_analyses(db: Session, rows: List[dict]):
+    """Store new analyses, then evict expired entries and the oldest ones beyond the size limit."""
+    ttl_threshold = datetime.utcnow() - timedelta(hours=settings.analysis_cache_ttl_hours)
+    db.query(AnalysisCacheEntry).filter(AnalysisCacheEntry.created_at < ttl_threshold).delete(synchronize_session=False)
+    if rows:
+        created_at = datetime.utcnow()
+        db.execute(
+            insert_or_ignore(db, AnalysisCacheEntry, ["cache_key"]),
+            [{**row, "created_at": created_at} for row in rows],
+        )
+    
+    overflow = db.query(AnalysisCacheEntry).count() - settings.analysis_cache_max_entries
+    if overflow > 0:
+        oldest = db.query(AnalysisCacheEntry.id).order_by(AnalysisCacheEntry.created_at).limit(overflow)
+        db.query(AnalysisCacheEntry).filter(AnalysisCacheEntry.id.in_(oldest.scalar_subquery())).delete(synchronize_session=False)
+    db.commit()
+
+async def analyze_batch(
+    client: AsyncOpenAI,
+    posts: List[RedditPost],
+    context_str: str,
+    analysis_type: Optional[str],
+    semaphore: asyncio.Semaphore,
+) -> List[Optional[Dict[str, Any]]]:
+    """Score several posts in one completion; items that cannot be parsed come back as None."""
+    per_post_output = ANSWER_TOKENS_PER_POST.get(analysis_type, ANSWER_TOKENS_PER_POST["detailed"])
+    try:
+        async with semaphore:
+            response = await create_chat_completion(
+                client,
+                model=settings.openai_model,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": build_batch_prompt(posts, context_str, analysis_type)}
+                ],
+                temperature=0.3,
+                max_tokens=min(per_post_output * len(posts) + BATCH_ANSWER_OVERHEAD, settings.openai_max_completion_tokens)
+            )
+        results = parse_batch_results(response.choices[0].message.content, len(posts))
+    except Exception as e:
+        print(f"Error analyzing batch of {len(posts)} posts: {e}")
+        results = {}
+    return [results.get(index) for index in range(len(posts))]
+
+async def analyze_post(
+    client: AsyncOpenAI,
+    post: RedditPost,
+    context_str: str,
+    analysis_type: Optional[str],
+    semaphore: asyncio.Semaphore,
+) -> Optional[Dict[str, Any]]:
+    """Score one post, returning the parsed analysis or None if it fails."""
+    try:
+        async with semaphore:
+            response = await create_chat_completion(
+                client,
+                model=settings.openai_model,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": build_prompt(post, context_str, analysis_type)}
+                ],
+                temperature=0.3,
+                max_tokens=500
+            )
+        
+        # Parse JSON response
+        return json.loads(response.choices[0].message.content)
+    except Exception as e:
+        print(f"Error analyzing post {post.title}: {e}")
+        return None
+
+async def iter_fresh_analyses(
+    client: AsyncOpenAI,
+    posts: List[RedditPost],
+    context_str: str,
+    analysis_type: Optional[str],
+    batched: bool,
+):
+    """Yield (index, analysis_data) for posts in completion order; analysis_data is None on failure.
+    
+    In batched mode, posts that a batch answer leaves unparsed are retried one by
+    one as soon as that batch finishes.
+    """
+    semaphore = asyncio.Semaphore(max(1, settings.openai_max_concurrency))
+    
+    async def run_single(index: int):
+        analysis_data = await analyze_post(client, posts[index], context_str, analysis_type, semaphore)
+        return [(index, analysis_data, False)]
+    
+    async def run_batch(batch: List[int]):
+        results = await analyze_batch(client, [posts[i] for i in batch], context_str, analysis_type, semaphore)
+        return [(index, analysis_data, True) for index, analysis_data in zip(batch, results)]
+    
+    if batched:
+        # Pack posts into shared-prefix prompts
+        pending = {asyncio.create_task(run_batch(batch)) for batch in plan_batches(posts, context_str, analysis_type)}
+    else:
+        pending = {asyncio.create_task(run_single(index)) for index in range(len(posts))}
+    
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                for index, analysis_data, retryable in task.result():
+                    if analysis_data is None and retryable:
+                        pending.add(asyncio.create_task(run_single(index)))
+                    else:
+                        yield index, analysis_data
+    finally:
+        for task in pending:
+            task.cancel()
+
+def record_cache_lookups(hits: int, lookups: int):
+    CACHE_LOOKUPS.labels("analysis", "hit").inc(hits)
+    CACHE_LOOKUPS.labels("analysis", "miss").inc(lookups - hits)
+
+def plan_analysis(
+    cached: Dict[str, Dict[str, Any]],
+    cache_keys: List[str],
+    selected: Optional[Set[int]] = None,
+) -> List[tuple[str, List[int]]]:
+    """Group uncached post indexes by cache key so each distinct post is analyzed once.
+    
+    With selected, only keys of those post indexes are planned, each led by a selected
+    post; other posts sharing a planned key get its analysis, the rest stay unscored.
+    """
+    misses: Dict[str, List[int]] = {}
+    for index, cache_key in enumerate(cache_keys):
+        if cache_key not in cached and (selected is None or index in selected):
+            misses.setdefault(cache_key, []).append(index)
+    if selected is not None:
+        for index, cache_key in enumerate(cache_keys):
+            if cache_key in misses and index not in selected:
+                misses[cache_key].append(index)
+    return list(misses.items())
+
+def build_prerank_query(business_context: BusinessContext) -> str:
+    """Text the local pre-ranking compares posts against."""
+    return " ".join([business_context.specialty, business_context.target_audience, *business_context.interests])
+
+def prerank_posts(request: AnalysisRequest) -> tuple[List[float], Set[int]]:
+    """Score posts locally against the business context and pick the indexes worth sending to the model."""
+    with timed_stage("prerank"):
+        scores = prerank.score_texts(
+            build_prerank_query(request.business_context),
+            [f"{post.title}\n{post.selftext or ''}" for post in request.posts],
+        )
+    top_n = settings.analysis_prerank_top_n if request.prerank_top_n is None else request.prerank_top_n
+    min_score = settings.analysis_prerank_min_score if request.prerank_min_score is None else request.prerank_min_score
+    return [round(float(score), 4) for score in scores], prerank.select_top(scores, top_n, min_score)
+
+def plan_duplicates(
+    request: AnalysisRequest,
+    cache_keys: List[str],
+    cached: Dict[str, Dict[str, Any]],
+) -> List[str]:
+    """Key each uncached post's analysis by its near-duplicate group's first post, or by the earlier post it reposts.
+    
+    Posts sharing a key are analyzed once, like identical posts. A post a search marked
+    duplicate_of an earlier post shares that post's key when the earlier post is in
+    the request; otherwise it is analyzed on its own.
+    """
+    if not request.collapse_duplicates:
+        return cache_keys
+    with timed_stage("fingerprint"):
+        fingerprints = dedupe.simhash_texts([f"{post.title}\n{post.selftext or ''}" for post in request.posts]).tolist()
+    representatives = list(range(len(cache_keys)))
+    for group in dedupe.group_near_duplicates(fingerprints, settings.duplicate_max_distance):
+        for index in group:
+            representatives[index] = group[0]
+    
+    # Follow duplicate_of to the earliest post of the chain that is in the request
+    by_reddit_id = {post.reddit_id: index for index, post in enumerate(request.posts) if post.reddit_id}
+    for index in range(len(cache_keys)):
+        earlier, seen = index, {index}
+        while request.posts[earlier].duplicate_of in by_reddit_id and by_reddit_id[request.posts[earlier].duplicate_of] not in seen:
+            earlier = by_reddit_id[request.posts[earlier].duplicate_of]
+            seen.add(earlier)
+        if earlier != index:
+            representatives[index] = representatives[earlier]
+    
+    return [
+        cache_key if cache_key in cached else cache_keys[representatives[index]]
+        for index, cache_key in enumerate(cache_keys)
+    ]
+
+def count_prefiltered(
+    cached: Dict[str, Dict[str, Any]],
+    cache_keys: List[str],
+    misses: List[tuple[str, List[int]]],
+) -> int:
+    """Count uncached posts left unscored because the pre-ranking kept them and their near-duplicates from the model."""
+    planned = {index for _, indexes in misses for index in indexes}
+    return sum(
+        1 for index, cache_key in enumerate(cache_keys)
+        if cache_key not in cached and index not in planned
+    )
+
+def count_collapsed(cache_keys: List[str], analysis_keys: List[str]) -> int:
+    """Count posts answered through a near-duplicate or the earlier post they repost."""
+    return sum(1 for cache_key, analysis_key in zip(cache_keys, analysis_keys) if cache_key != analysis_key)
+
+def build_cache_entry(cache_key: str, post: RedditPost, analysis_data: Dict[str, Any]) -> dict:
+    """Build an analysis_cache row for a freshly analyzed post."""
+    return {
+        "cache_key": cache_key,
+        "reddit_id": post.reddit_id,
+        "result": json.dumps(analysis_data),
+    }
+
+@router.post(
+    "/analyze",
+    response_model=AnalysisResponse,
+    response_class=ModelJSONResponse,
+    dependencies=[Depends(profile_request)],
+)
+async def analyze_posts(request: AnalysisRequest, response: Response, db: ThreadpoolSession = Depends(get_db)):
+    """Analyze Reddit posts using OpenAI for relevance scoring."""
+    try:
+        started = time.perf_counter()
+        timings = start_request_timings() if request.include_timings else None
+        client = get_openai_client()
+        context_str = build_context_str(request.business_context)
+        
+        # Serve previously analyzed posts from the cache
+        context_hash = get_context_hash(request.business_context, request.analysis_type)
+        cache_keys = [get_cache_key(post, context_hash) for post in request.posts]
+        analyses = await db.run(get_cached_analyses, cache_keys)
+        cache_hits = sum(1 for cache_key in cache_keys if cache_key in analyses)
+        record_cache_lookups(cache_hits, len(cache_keys))
+        
+        # Analyze each uncached post that ranks well locally once per near-duplicate group, concurrently
+        analysis_keys = plan_duplicates(request, cache_keys, analyses)
+        local_scores, selected = prerank_posts(request)
+        misses = plan_analysis(analyses, analysis_keys, selected)
+        prefiltered = count_prefiltered(analyses, analysis_keys, misses)
+        miss_posts = [request.posts[indexes[0]] for _, indexes in misses]
+        new_entries = []
+        async for miss_index, analysis_data in iter_fresh_analyses(
+            client, miss_posts, context_str, request.analysis_type, request.batched
+        ):
+            # Only answers that build a valid AnalyzedPost are used and cached
+            if analysis_data is not None and try_build_analyzed_post(
+                miss_posts[miss_index], analysis_data, request.analysis_type
+            ) is not None:
+                cache_key = misses[miss_index][0]
+                analyses[cache_key] = analysis_data
+                new_entries.append(build_cache_entry(cache_key, miss_posts[miss_index], analysis_data))
+        await db.run(store_cached_analyses, new_entries)
+        
+        # Keep the original post order; posts whose analysis failed, was malformed or was skipped are returned unscored
+        analyzed_posts = [
+            (
+                analysis_key in analyses
+                and try_build_analyzed_post(post, analyses[analysis_key], request.analysis_type, local_score)
+            ) or build_unscored_post(post, local_score)
+            for post, analysis_key, local_score in zip(request.posts, analysis_keys, local_scores)
+        ]
         
         # Calculate statistics
         relevant_posts = [p for p in analyzed_posts if p.relevance_score is not None]
         high_relevance_count = len([p for p in relevant_posts if p.relevance_score >= 70])
         average_relevance = sum(p.relevance_score for p in relevant_posts) / len(relevant_posts) if relevant_posts else 0
+        record_stage("analysis_total", time.perf_counter() - started)
         
-        return AnalysisResponse(
+        return model_json_response(AnalysisResponse(
             analyzed_posts=analyzed_posts,
             total_analyzed=len(analyzed_posts),
             high_relevance_count=high_relevance_count,
-            average_relevance=average_relevance
-        )
+            average_relevance=average_relevance,
+            cache_hits=cache_hits,
+            cache_misses=len(request.posts) - cache_hits,
+            prefiltered=prefiltered,
+            collapsed_duplicates=count_collapsed(cache_keys, analysis_keys),
+            timings=round_timings(timings)
+        ), response)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {e}")
 
+async def stream_analysis_events(request: AnalysisRequest, client: AsyncOpenAI):
+    """Yield each analyzed post as soon as it is scored, with running totals, then a summary."""
+    # The request-scoped session is closed once the endpoint returns, so the stream owns its own
+    db = ThreadpoolSession(SessionLocal())
+    try:
+        context_str = build_context_str(request.business_context)
+        context_hash = get_context_hash(request.business_context, request.analysis_type)
+        cache_keys = [get_cache_key(post, context_hash) for post in request.posts]
+        cached = await db.run(get_cached_analyses, cache_keys)
+        cache_hits = sum(1 for cache_key in cache_keys if cache_key in cached)
+        record_cache_lookups(cache_hits, len(cache_keys))
+        analysis_keys = plan_duplicates(request, cache_keys, cached)
+        local_scores, selected = prerank_posts(request)
+        misses = plan_analysis(cached, analysis_keys, selected)
+        prefiltered = count_prefiltered(cached, analysis_keys, misses)
+        planned = {index for _, indexes in misses for index in indexes}
+        
+        completed = 0
+        scored = 0
+        score_total = 0
+        high_relevance_count = 0
+        
+        def post_event(index: int, analysis_data: Optional[Dict[str, Any]]) -> str:
+            nonlocal completed, scored, score_total, high_relevance_count
+            post = request.posts[index]
+            analyzed_post = (
+                analysis_data is not None
+                and try_build_analyzed_post(post, analysis_data, request.analysis_type, local_scores[index])
+            ) or build_unscored_post(post, local_scores[index])
+            completed += 1
+            if analyzed_post.relevance_score is not None:
+                scored += 1
+                score_total += analyzed_post.relevance_score
+                if analyzed_post.relevance_score >= 70:
+                    high_relevance_count += 1
+            return ndjson_event("post", {
+                "index": index,
+                "post": analyzed_post.model_dump(),
+                "completed": completed,
+                "high_relevance_count": high_relevance_count,
+                "average_relevance": score_total / scored if scored else 0,
+            })
+        
+        # Cached posts, and posts the pre-ranking keeps from the model, go out immediately; posts
+        # sharing a near-duplicate group with a selected post wait for that group's analysis
+        for index, analysis_key in enumerate(analysis_keys):
+            if analysis_key in cached:
+                yield post_event(index, cached[analysis_key])
+            elif index not in planned:
+                yield post_event(index, None)
+        
+        miss_posts = [request.posts[indexes[0]] for _, indexes in misses]
+        new_entries = []
+        async for miss_index, analysis_data in iter_fresh_analyses(
+            client, miss_posts, context_str, request.analysis_type, request.batched
+        ):
+            cache_key, indexes = misses[miss_index]
+            if analysis_data is not None and try_build_analyzed_post(
+                miss_posts[miss_index], analysis_data, request.analysis_type
+            ) is None:
+                analysis_data = None
+            if analysis_data is not None:
+                new_entries.append(build_cache_entry(cache_key, miss_posts[miss_index], analysis_data))
+            for index in indexes:
+                yield post_event(index, analysis_data)
+        await db.run(store_cached_analyses, new_entries)
+        
+        summary = AnalysisResponse(
+            analyzed_posts=[],
+            total_analyzed=completed,
+            high_relevance_count=high_relevance_count,
+            average_relevance=score_total / scored if scored else 0,
+            cache_hits=cache_hits,
+            cache_misses=len(request.posts) - cache_hits,
+            prefiltered=prefiltered,
+            collapsed_duplicates=count_collapsed(cache_keys, analysis_keys)
+        )
+        yield ndjson_event("summary", summary.model_dump(exclude={"analyzed_posts"}))
+    except Exception as e:
+        yield ndjson_event("error", {"detail": f"Analysis failed: {e}"})
+    finally:
+        await db.close()
+
+@router.post("/analyze/stream")
+async def analyze_posts_stream(request: AnalysisRequest):
+    """Stream analyzed posts as newline-delimited JSON as each one is scored."""
+    # Resolve the client up front so a missing API key still surfaces as an HTTP error
+    client = get_openai_client()
+    return StreamingResponse(stream_analysis_events(request, client), media_type=NDJSON_MEDIA_TYPE)
+
 @router.get("/health")
 async def analysis_health():
     """Check if OpenAI client is working."""
     try:
         client = get_openai_client()
         # Test with a simple completion
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
+        response = await client.chat.completions.create(
+            model=settings.openai_model,
             messages=[{"role": "user", "content": "Hello"}],
             max_tokens=5
         )
@@ -0,0 +1,416 @@
+from fastapi import APIRouter, HTTPException, Depends, Request
+from typing import Dict, List, Optional
+from datetime import datetime, timedelta
+import asyncio
+import time
+import httpx
+import json
+from sqlalchemy.orm import Session
+from app.models.monitor import MonitorCreate, MonitorOut, MonitorMatchOut, MonitorRunResult
+from app.core.config import settings
+from app.core import listing_planner
+from app.core.matcher import KeywordMatcher
+from app.api.reddit import (
+    fetch_listing_page, fetch_subreddit_matches, get_reddit_access_token, reddit_auth_headers, split_by_subreddit
+)
+from app.database import (
+    get_db, insert_or_ignore, Monitor, MonitorCursor, MonitorMatch, SessionLocal, ThreadpoolSession
+)
+
+router = APIRouter()
+
+def monitor_to_out(monitor: Monitor) -> MonitorOut:
+    return MonitorOut(
+        id=monitor.id,
+        name=monitor.name,
+        keywords=json.loads(monitor.keywords),
+        subreddits=json.loads(monitor.subreddits),
+        whole_word=monitor.whole_word,
+        interval_minutes=monitor.interval_minutes,
+        enabled=monitor.enabled,
+        created_at=monitor.created_at.isoformat(),
+        last_run_at=monitor.last_run_at.isoformat() if monitor.last_run_at else None,
+    )
+
+def get_monitor(db: Session, monitor_id: int) -> Optional[Monitor]:
+    return db.query(Monitor).filter(Monitor.id == monitor_id).first()
+
+def get_due_monitors(db: Session, now: datetime) -> List[Monitor]:
+    """Return enabled monitors whose interval has elapsed since their last run."""
+    monitors = db.query(Monitor).filter(Monitor.enabled.is_(True)).all()
+    return [
+        monitor for monitor in monitors
+        if monitor.last_run_at is None
+        or monitor.last_run_at + timedelta(minutes=monitor.interval_minutes) <= now
+    ]
+
+def get_monitor_cursors(db: Session, monitor_id: int) -> Dict[str, tuple[str, float, Optional[str]]]:
+    """Return the newest polled fullname, its epoch timestamp and the fullname just older per subreddit for a monitor."""
+    rows = db.query(
+        MonitorCursor.subreddit, MonitorCursor.newest_fullname, MonitorCursor.newest_created_utc, MonitorCursor.previous_fullname
+    ).filter(MonitorCursor.monitor_id == monitor_id)
+    return {
+        subreddit: (fullname, created_utc.timestamp(), previous_fullname)
+        for subreddit, fullname, created_utc, previous_fullname in rows
+    }
+
+def save_monitor_run(db: Session, monitor_id: int, matches: List[dict], marks: Dict[str, dict], ran_at: datetime):
+    """Store new matches, advance high-water marks and record the run in one transaction."""
+    if matches:
+        db.execute(
+            insert_or_ignore(db, MonitorMatch, ["monitor_id", "reddit_id"]),
+            [{**row, "monitor_id": monitor_id, "found_at": ran_at} for row in matches],
+        )
+    
+    cursors = {
+        cursor.subreddit: cursor
+        for cursor in db.query(MonitorCursor).filter(MonitorCursor.monitor_id == monitor_id)
+    }
+    for subreddit, mark in marks.items():
+        cursor = cursors.get(subreddit)
+        if cursor is None:
+            db.add(MonitorCursor(monitor_id=monitor_id, subreddit=subreddit, updated_at=ran_at, **mark))
+        elif mark["newest_created_utc"] >= cursor.newest_created_utc:
+            cursor.newest_fullname = mark["newest_fullname"]
+            cursor.newest_created_utc = mark["newest_created_utc"]
+            cursor.previous_fullname = mark["previous_fullname"]
+            cursor.updated_at = ran_at
+    
+    db.query(Monitor).filter(Monitor.id == monitor_id).update({"last_run_at": ran_at})
+    db.commit()
+
+def get_previous_fullname(listed: List[dict], older: Optional[str] = None) -> Optional[str]:
+    """Fullname of the post just older than the newest listed post: the next one listed, or older if it was the only one."""
+    if len(listed) > 1:
+        return listed[1].get("name")
+    return older
+
+async def fetch_new_since(
+    client: httpx.AsyncClient,
+    headers: dict,
+    subreddit_name: str,
+    cursor: Optional[tuple[str, float, Optional[str]]],
+    semaphore: asyncio.Semaphore,
+) -> tuple[List[dict], int, Optional[dict], Optional[str]]:
+    """Fetch posts newer than the high-water mark, newest first.
+    
+    Without a mark only the first page of /new is read to establish one. With a mark,
+    Reddit's before cursor returns just the newer posts. Paging starts from the post
+    just older than the mark, so the listing includes the mark's post itself and an
+    idle subreddit still returns one post. Reddit returns an empty before listing
+    once the cursor's post is deleted or removed; only then is the first page of /new
+    read, filtered by the mark's timestamp, and the mark moved to the newest post
+    there. Returns the new posts, the number of requests made, and the post to take
+    as the new mark and the fullname just older than it, if any.
+    """
+    if cursor is None:
+        data = await fetch_listing_page(client, headers, subreddit_name, None, semaphore)
+        posts = [child.get("data", {}) for child in data.get("data", {}).get("children", [])]
+        return posts, 1, posts[0] if posts else None, get_previous_fullname(posts)
+    
+    newest_fullname, newest_created_utc, previous_fullname = cursor
+    is_new = lambda post: post.get("created_utc", 0) >= newest_created_utc and post.get("name") != newest_fullname
+    posts: List[dict] = []
+    before = previous_fullname or newest_fullname
+    requests = 0
+    while requests < max(1, settings.reddit_max_pages_per_subreddit):
+        data = await fetch_listing_page(client, headers, subreddit_name, None, semaphore, before=before)
+        requests += 1
+        children = [child.get("data", {}) for child in data.get("data", {}).get("children", [])]
+        if not children and requests == 1:
+            data = await fetch_listing_page(client, headers, subreddit_name, None, semaphore)
+            latest = [child.get("data", {}) for child in data.get("data", {}).get("children", [])]
+            posts = [post for post in latest if is_new(post)]
+            return posts, requests + 1, latest[0] if latest else None, get_previous_fullname(latest)
+        # Pages walk towards newer posts, so prepend to keep newest-first order
+        posts = children + posts
+        if len(children) < 100:
+            break
+        before = children[0].get("name")
+    new_posts = [post for post in posts if is_new(post)]
+    if not new_posts:
+        return new_posts, requests, None, None
+    # The listing holds every post newer than the one paging started from
+    listed = posts[posts.index(new_posts[0]):]
+    return new_posts, requests, new_posts[0], get_previous_fullname(listed, previous_fullname or newest_fullname)
+
+async def fetch_new_since_group(
+    client: httpx.AsyncClient,
+    headers: dict,
+    subreddit_names: List[str],
+    cursors: Dict[str, tuple[str, float, Optional[str]]],
+    matcher: KeywordMatcher,
+    semaphore: asyncio.Semaphore,
+) -> tuple[Optional[Dict[str, List[dict]]], Dict[str, Optional[str]], int]:
+    """Fetch posts newer than each subreddit's high-water mark through one combined listing.
+    
+    The r/a+b+c listing is paged down to the oldest mark in the group and split back
+    out per subreddit. Returns the new posts by subreddit, newest first, the fullname
+    just older than each subreddit's newest post, and the number of requests made; the
+    posts are None if the listing failed or ran out of pages.
+    """
+    oldest_mark = min(cursors[subreddit_name][1] for subreddit_name in subreddit_names)
+    seen_posts: List[dict] = []
+    pages = 0
+    def count_page(_, page):
+        nonlocal pages
+        pages = page
+    _, _, complete = await fetch_subreddit_matches(
+        client, headers, "+".join(subreddit_names), matcher, oldest_mark, semaphore,
+        on_page=count_page, seen_posts=seen_posts,
+    )
+    if not complete:
+        return None, {}, max(1, pages)
+    
+    posts_by_subreddit = split_by_subreddit(subreddit_names, seen_posts, lambda post: post)
+    previous_fullnames = {}
+    for subreddit_name, posts in posts_by_subreddit.items():
+        newest_fullname, newest_created_utc, _ = cursors[subreddit_name]
+        new_posts = [
+            post for post in posts
+            if post.get("created_utc", 0) >= newest_created_utc and post.get("name") != newest_fullname
+        ]
+        if new_posts:
+            previous_fullnames[subreddit_name] = get_previous_fullname(posts[posts.index(new_posts[0]):], newest_fullname)
+        posts_by_subreddit[subreddit_name] = new_posts
+    return posts_by_subreddit, previous_fullnames, pages
+
+async def poll_monitor(app, monitor_id: int) -> MonitorRunResult:
+    """Fetch each subreddit's posts newer than its high-water mark and record keyword matches."""
+    db = ThreadpoolSession(SessionLocal())
+    try:
+        monitor = await db.run(get_monitor, monitor_id)
+        if monitor is None:
+            raise HTTPException(status_code=404, detail="Monitor not found")
+        subreddits = json.loads(monitor.subreddits)
+        matcher = KeywordMatcher(json.loads(monitor.keywords), whole_word=monitor.whole_word)
+        cursors = await db.run(get_monitor_cursors, monitor_id)
+        
+        access_token = await get_reddit_access_token(app)
+        client = app.state.reddit_client
+        headers = reddit_auth_headers(access_token)
+        semaphore = asyncio.Semaphore(max(1, settings.reddit_max_concurrency))
+        
+        polled: Dict[str, List[dict]] = {}
+        anchors: Dict[str, tuple[dict, Optional[str]]] = {}
+        requests = 0
+        
+        async def poll_subreddit(subreddit_name: str):
+            nonlocal requests
+            cursor = cursors.get(subreddit_name)
+            try:
+                posts, made, anchor, previous_fullname = await fetch_new_since(client, headers, subreddit_name, cursor, semaphore)
+            except Exception as e:
+                print(f"Monitor {monitor_id}: error polling r/{subreddit_name}: {e}")
+                requests += 1
+                return
+            polled[subreddit_name] = posts
+            if anchor is not None:
+                anchors[subreddit_name] = (anchor, previous_fullname)
+            requests += made
+        
+        async def poll_group(group: List[str]):
+            nonlocal requests
+            if len(group) > 1:
+                posts_by_subreddit, previous_fullnames, made = await fetch_new_since_group(
+                    client, headers, group, cursors, matcher, semaphore
+                )
+                requests += made
+                if posts_by_subreddit is not None:
+                    polled.update(posts_by_subreddit)
+                    anchors.update({
+                        name: (posts[0], previous_fullnames.get(name))
+                        for name, posts in posts_by_subreddit.items() if posts
+                    })
+                    return
+            await asyncio.gather(*(poll_subreddit(name) for name in group))
+        
+        # Subreddits with a high-water mark can share combined listings; new ones establish their mark alone
+        ran_at = datetime.utcnow()
+        now = time.time()
+        marked = [name for name in dict.fromkeys(subreddits) if name in cursors]
+        groups = listing_planner.plan_listing_groups({name: now - cursors[name][1] for name in marked})
+        groups += [[name] for name in dict.fromkeys(subreddits) if name not in cursors]
+        await asyncio.gather(*(poll_group(group) for group in groups))
+        for name in marked:
+            if name in polled:
+                listing_planner.record_post_rate(name, len(polled[name]), now - cursors[name][1])
+        
+        matches = []
+        marks = {}
+        posts_scanned = 0
+        for subreddit_name in dict.fromkeys(subreddits):
+            posts = polled.get(subreddit_name, [])
+            posts_scanned += len(posts)
+            anchor, previous_fullname = anchors.get(subreddit_name, (None, None))
+            if anchor is not None and anchor.get("name"):
+                # A re-anchored mark may point at an older post; its timestamp never moves back
+                created_utc = anchor.get("created_utc", 0)
+                if subreddit_name in cursors:
+                    created_utc = max(created_utc, cursors[subreddit_name][1])
+                marks[subreddit_name] = {
+                    "newest_fullname": anchor["name"],
+                    "newest_created_utc": datetime.fromtimestamp(created_utc),
+                    "previous_fullname": previous_fullname,
+                }
+            for post in posts:
+                text = f"{post.get('title', '')}\n{post.get('selftext', '')}"
+                is_match, matched_keywords = matcher.match(text)
+                if is_match and post.get("id"):
+                    matches.append({
+                        "reddit_id": post["id"],
+                        "title": post.get("title", ""),
+                        "subreddit": post.get("subreddit", subreddit_name),
+                        "url": f"https://reddit.com{post.get('permalink', '')}",
+                        "keywords": json.dumps(matched_keywords),
+                        "score": post.get("score", 0),
+                        "num_comments": post.get("num_comments", 0),
+                        "created_utc": datetime.fromtimestamp(post.get("created_utc", 0)),
+                    })
+        
+        await db.run(save_monitor_run, monitor_id, matches, marks, ran_at)
+        return MonitorRunResult(
+            monitor_id=monitor_id,
+            new_matches=len(matches),
+            posts_scanned=posts_scanned,
+            requests=requests,
+        )
+    finally:
+        await db.close()
+
+class MonitorScheduler:
+    """Polls due monitors in the background of the running app."""
+
+    def __init__(self, app):
+        self.app = app
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run_due(self):
+        """Poll every monitor whose interval has elapsed."""
+        db = ThreadpoolSession(SessionLocal())
+        try:
+            due = await db.run(get_due_monitors, datetime.utcnow())
+            due_ids = [monitor.id for monitor in due]
+        finally:
+            await db.close()
+        
+        for monitor_id in due_ids:
+            try:
+                result = await poll_monitor(self.app, monitor_id)
+                print(f"Monitor {monitor_id}: {result.new_matches} new matches from {result.requests} requests")
+            except Exception as e:
+                print(f"Monitor {monitor_id} failed: {e}")
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_due()
+            except Exception as e:
+                print(f"Monitor scheduler error: {e}")
+            await asyncio.sleep(settings.monitor_poll_seconds)
+
+@router.post("", response_model=MonitorOut)
+async def create_monitor(request: MonitorCreate, db: ThreadpoolSession = Depends(get_db)):
+    """Save a keyword/subreddit set for background polling."""
+    if not request.keywords or not request.subreddits:
+        raise HTTPException(status_code=400, detail="Monitors need at least one keyword and one subreddit")
+    
+    def create(session: Session) -> MonitorOut:
+        monitor = Monitor(
+            name=request.name,
+            keywords=json.dumps(request.keywords),
+            subreddits=json.dumps(request.subreddits),
+            whole_word=request.whole_word,
+            interval_minutes=max(1, request.interval_minutes),
+            enabled=request.enabled,
+        )
+        session.add(monitor)
+        session.commit()
+        return monitor_to_out(monitor)
+    
+    try:
+        return await db.run(create)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to create monitor: {e}")
+
+@router.get("", response_model=List[MonitorOut])
+async def list_monitors(db: ThreadpoolSession = Depends(get_db)):
+    """List saved monitors."""
+    try:
+        monitors = await db.run(lambda session: session.query(Monitor).order_by(Monitor.id).all())
+        return [monitor_to_out(monitor) for monitor in monitors]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to list monitors: {e}")
+
+@router.delete("/{monitor_id}")
+async def delete_monitor(monitor_id: int, db: ThreadpoolSession = Depends(get_db)):
+    """Delete a monitor together with its high-water marks and matches."""
+    def delete(session: Session) -> bool:
+        monitor = get_monitor(session, monitor_id)
+        if monitor is None:
+            return False
+        session.query(MonitorCursor).filter(MonitorCursor.monitor_id == monitor_id).delete()
+        session.query(MonitorMatch).filter(MonitorMatch.monitor_id == monitor_id).delete()
+        session.delete(monitor)
+        session.commit()
+        return True
+    
+    try:
+        if not await db.run(delete):
+            raise HTTPException(status_code=404, detail="Monitor not found")
+        return {"message": f"Monitor {monitor_id} deleted"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to delete monitor: {e}")
+
+@router.post("/{monitor_id}/run", response_model=MonitorRunResult)
+async def run_monitor(monitor_id: int, req: Request):
+    """Poll a monitor immediately instead of waiting for the scheduler."""
+    try:
+        return await poll_monitor(req.app, monitor_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Monitor run failed: {e}")
+
+@router.get("/{monitor_id}/matches", response_model=List[MonitorMatchOut])
+async def get_monitor_matches(monitor_id: int, db: ThreadpoolSession = Depends(get_db), limit: int = 50):
+    """Get a monitor's most recently found matches."""
+    try:
+        matches = await db.run(
+            lambda session: session.query(MonitorMatch)
+            .filter(MonitorMatch.monitor_id == monitor_id)
+            .order_by(MonitorMatch.found_at.desc(), MonitorMatch.created_utc.desc())
+            .limit(limit)
+            .all()
+        )
+        return [
+            MonitorMatchOut(
+                reddit_id=match.reddit_id,
+                title=match.title,
+                subreddit=match.subreddit,
+                url=match.url,
+                keywords=json.loads(match.keywords),
+                score=match.score,
+                num_comments=match.num_comments,
+                created=match.created_utc.strftime("%Y-%m-%d %H:%M:%S"),
+                found_at=match.found_at.isoformat(),
+            )
+            for match in matches
+        ]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get monitor matches: {e}")
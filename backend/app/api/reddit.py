@@ -1,52 +1,42 @@
-from fastapi import APIRouter, HTTPException, Depends, Request
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import Callable, Dict, List, Optional, Set
 import time
 from datetime import datetime, timedelta, timezone
 import asyncio
+import base64
 import httpx
 import json
-import base64
+from sqlalchemy import and_, case, func, or_
 from sqlalchemy.orm import Session
-from app.models.reddit import SearchRequest, SearchResponse, RedditPost
+from app.models.reddit import SearchRequest, SearchResponse, DuplicatePost, MatchedComment, RedditPost
 from app.core.config import settings
-from app.database import get_db, DisplayedPost
+from app.core.streaming import NDJSON_MEDIA_TYPE, ndjson_event
+from app.core import comments, corpus, dedupe, listing_planner
+from app.core.matcher import KeywordMatcher
+from app.core.metrics import (
+    CACHE_LOOKUPS, POSTS_MATCHED, POSTS_SCANNED, record_stage, round_timings, start_request_timings, timed_stage
+)
+from app.core.profiling import profile_request
+from app.core.reddit_client import REDDIT_API_BASE
+from app.core.responses import ModelJSONResponse, model_json_response
+from app.core.seen_posts import SeenPostIndex
+from app.database import get_db, chunked, insert_or_ignore, run_in_session, DisplayedPost, SessionLocal, ThreadpoolSession
 
 router = APIRouter()
 
-async def get_reddit_access_token() -> str:
-    """Get Reddit OAuth2 access token."""
-    if not settings.reddit_client_id or not settings.reddit_client_secret:
+async def get_reddit_access_token(app) -> str:
+    """Get a cached Reddit OAuth2 access token from the shared token manager."""
+    token_manager = getattr(app.state, "reddit_tokens", None)
+    if token_manager is None:
         raise HTTPException(
             status_code=500,
-            detail="Reddit credentials not configured. Please set REDDIT_CLIENT_ID and REDDIT_CLIENT_SECRET."
-        )
-    
-    # Create basic auth header
-    credentials = f"{settings.reddit_client_id}:{settings.reddit_client_secret}"
-    encoded_credentials = base64.b64encode(credentials.encode()).decode()
-    
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            "https://www.reddit.com/api/v1/access_token",
-            headers={
-                "Authorization": f"Basic {encoded_credentials}",
-                "User-Agent": settings.reddit_user_agent or "RedditAgent/1.0 by /u/yourusername"
-            },
-            data={
-                "grant_type": "client_credentials"
-            }
+            detail="Reddit client not initialized. Call /api/initialize or configure credentials.",
         )
-        
-        if response.status_code != 200:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Failed to get Reddit access token: {response.text}"
-            )
-        
-        token_data = response.json()
-        return token_data["access_token"]
+    with timed_stage("reddit_token"):
+        return await token_manager.get_token()
 
-async def get_reddit_client(request: Request):
+def get_reddit_client(request: Request) -> httpx.AsyncClient:
     """Return shared httpx client from app.state."""
     reddit_client = getattr(request.app.state, "reddit_client", None)
     if reddit_client is None:
@@ -56,125 +46,665 @@ async def get_reddit_client(request: Request):
         )
     return reddit_client
 
-def matches(text: str, keywords: List[str]) -> tuple[bool, List[str]]:
-    """Check if text matches any keywords."""
-    t = (text or "").lower()
-    matched_keywords = [k for k in keywords if k.lower() in t]
-    return bool(matched_keywords), matched_keywords
+def reddit_auth_headers(access_token: str) -> dict:
+    """Build per-request headers for authenticated Reddit API calls."""
+    return {"Authorization": f"Bearer {access_token}"}
 
-def is_post_stale(db: Session, reddit_id: str) -> bool:
-    """Check if a Reddit post is stale (displayed more than 72 hours ago)."""
-    displayed_post = db.query(DisplayedPost).filter(DisplayedPost.reddit_id == reddit_id).first()
-    if not displayed_post:
-        return False
+STALE_THRESHOLD_HOURS = 72
+
+def get_stale_threshold() -> datetime:
+    """Posts displayed before this moment are stale."""
+    return datetime.utcnow() - timedelta(hours=STALE_THRESHOLD_HOURS)
+
+def get_displayed_at(db: Session, reddit_ids: List[str]) -> Dict[str, datetime]:
+    """Look up when each of the given posts was first displayed, in batched IN queries."""
+    displayed_at = {}
+    for chunk in chunked(list(dict.fromkeys(reddit_ids))):
+        rows = db.query(DisplayedPost.reddit_id, DisplayedPost.displayed_at).filter(
+            DisplayedPost.reddit_id.in_(chunk)
+        )
+        displayed_at.update({reddit_id: at for reddit_id, at in rows})
+    return displayed_at
+
+def mark_posts_as_displayed(db: Session, rows: List[dict]) -> datetime:
+    """Insert displayed posts in one statement, ignoring ids another search already stored, and commit."""
+    displayed_at = datetime.utcnow()
+    if not rows:
+        db.commit()
+        return displayed_at
+    statement = insert_or_ignore(db, DisplayedPost, ["reddit_id"])
+    db.execute(statement, [{**row, "displayed_at": displayed_at} for row in rows])
+    db.commit()
+    return displayed_at
+
+async def lookup_displayed_at(
+    db: ThreadpoolSession,
+    seen_posts: Optional[SeenPostIndex],
+    reddit_ids: List[str],
+) -> Dict[str, datetime]:
+    """Look up first display times, asking the database only about ids the seen-post index cannot settle."""
+    if seen_posts is None:
+        return await db.run(get_displayed_at, reddit_ids)
+    displayed_at, unresolved = seen_posts.lookup(reddit_ids)
+    if unresolved:
+        displayed_at.update(await db.run(get_displayed_at, unresolved))
+    return displayed_at
+
+async def record_displayed_posts(db: ThreadpoolSession, seen_posts: Optional[SeenPostIndex], rows: List[dict]):
+    """Store newly displayed posts and add them to the seen-post index."""
+    displayed_at = await db.run(mark_posts_as_displayed, rows)
+    if seen_posts is not None:
+        seen_posts.add(
+            (row["reddit_id"] for row in rows),
+            displayed_at,
+            {row["reddit_id"]: row["simhash"] for row in rows if row.get("simhash")},
+        )
+
+MAX_DISPLAYED_POSTS_PAGE = 500
+
+def encode_displayed_posts_cursor(post: DisplayedPost) -> str:
+    """Encode the position after a post as an opaque cursor for the next page."""
+    return base64.urlsafe_b64encode(f"{post.displayed_at.isoformat()}|{post.id}".encode()).decode()
+
+def decode_displayed_posts_cursor(cursor: str) -> tuple[datetime, int]:
+    """Decode a cursor from encode_displayed_posts_cursor, raising ValueError if it is malformed."""
+    try:
+        displayed_at, post_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(displayed_at), int(post_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def get_recent_displayed_posts(db: Session, limit: int, after: Optional[tuple[datetime, int]] = None) -> List[DisplayedPost]:
+    """Return displayed posts newest first, starting after the given (displayed_at, id) position.
     
-    # Check if displayed more than 72 hours ago
-    from datetime import timedelta
-    stale_threshold = datetime.utcnow() - timedelta(hours=72)
-    return displayed_post.displayed_at < stale_threshold
-
-def mark_post_as_displayed(db: Session, reddit_id: str, title: str, created_utc: datetime):
-    """Mark a Reddit post as displayed in the database."""
-    displayed_post = DisplayedPost(
-        reddit_id=reddit_id,
-        title=title,
-        created_utc=created_utc
-    )
-    db.add(displayed_post)
+    Seeks through the (displayed_at, id) index instead of using OFFSET, so deep pages
+    cost the same as the first.
+    """
+    query = db.query(DisplayedPost)
+    if after is not None:
+        displayed_at, post_id = after
+        query = query.filter(or_(
+            DisplayedPost.displayed_at < displayed_at,
+            and_(DisplayedPost.displayed_at == displayed_at, DisplayedPost.id < post_id),
+        ))
+    return query.order_by(DisplayedPost.displayed_at.desc(), DisplayedPost.id.desc()).limit(limit).all()
+
+def delete_displayed_post(db: Session, reddit_id: str) -> bool:
+    """Delete a displayed post, returning False if it was not stored."""
+    post = db.query(DisplayedPost).filter(DisplayedPost.reddit_id == reddit_id).first()
+    if not post:
+        return False
+    db.delete(post)
     db.commit()
-    return displayed_post
+    return True
 
-@router.post("/search", response_model=SearchResponse)
-async def search_reddit(request: SearchRequest, req: Request, db: Session = Depends(get_db)):
-    """Search Reddit for posts matching keywords."""
+def count_displayed_posts(db: Session, stale_threshold: datetime) -> tuple[int, int]:
+    """Return the total and stale displayed post counts from one aggregate query."""
+    total_posts, stale_posts = db.query(
+        func.count(DisplayedPost.id),
+        func.coalesce(func.sum(case((DisplayedPost.displayed_at < stale_threshold, 1), else_=0)), 0),
+    ).one()
+    return total_posts, int(stale_posts)
+
+async def fetch_listing_page(
+    client: httpx.AsyncClient,
+    headers: dict,
+    subreddit_name: str,
+    after: Optional[str],
+    semaphore: asyncio.Semaphore,
+    before: Optional[str] = None,
+) -> dict:
+    """Fetch one page of a subreddit's /new listing, older than after or newer than before."""
+    params = {"limit": 100}
+    if after:
+        params["after"] = after
+    if before:
+        params["before"] = before
+    
+    async with semaphore:
+        # Use Reddit's JSON API with authentication
+        with timed_stage("reddit_listing"):
+            response = await client.get(f"{REDDIT_API_BASE}/r/{subreddit_name}/new", params=params, headers=headers)
+        response.raise_for_status()
+        return response.json()
+
+async def fetch_subreddit_matches(
+    client: httpx.AsyncClient,
+    headers: dict,
+    subreddit_name: str,
+    matcher: KeywordMatcher,
+    cutoff_timestamp: int,
+    semaphore: asyncio.Semaphore,
+    on_page: Optional[Callable[[List[tuple[dict, List[str]]], int], None]] = None,
+    seen_posts: Optional[List[dict]] = None,
+) -> tuple[List[tuple[dict, List[str]]], bool, bool]:
+    """Page through a subreddit's newest posts down to the cutoff and return keyword matches.
+    
+    The next page is requested before the current one is matched so the round trip
+    overlaps with matching. on_page, if given, receives each page's matches and the
+    page count as soon as the page is matched; seen_posts, if given, collects every
+    post inside the window. Returns the matches, whether the page budget ran out
+    before the cutoff was reached, and whether the cutoff was reached without errors.
+    """
+    max_pages = max(1, settings.reddit_max_pages_per_subreddit)
+    found = []
+    pages = 0
+    truncated = False
+    complete = False
+    next_page = asyncio.create_task(fetch_listing_page(client, headers, subreddit_name, None, semaphore))
     try:
-        # Get Reddit access token
-        access_token = await get_reddit_access_token()
-        
-        # Create authenticated client
-        headers = {
-            "Authorization": f"Bearer {access_token}",
-            "User-Agent": settings.reddit_user_agent or "RedditAgent/1.0 by /u/yourusername"
-        }
-        
-        async with httpx.AsyncClient(headers=headers, timeout=30.0) as client:
-            results = []
-            new_posts_count = 0
-            start_time = time.time()
+        while next_page is not None:
+            data = await next_page
+            next_page = None
+            pages += 1
+            
+            listing = data.get("data", {})
+            children = listing.get("children", [])
+            after = listing.get("after")
+            oldest = children[-1].get("data", {}).get("created_utc", 0) if children else 0
+            reached_cutoff = not after or not children or oldest < cutoff_timestamp
             
-            # Calculate timestamp for specified days back
-            cutoff_time = datetime.now(timezone.utc) - timedelta(days=request.days_back)
-            cutoff_timestamp = int(cutoff_time.timestamp())
+            if not reached_cutoff and pages >= max_pages:
+                truncated = True
+            elif not reached_cutoff:
+                # Prefetch and let the request go out before matching this page
+                next_page = asyncio.create_task(fetch_listing_page(client, headers, subreddit_name, after, semaphore))
+                await asyncio.sleep(0)
             
-            # Process each subreddit
-            for subreddit_name in request.subreddits:
-                try:
-                    # Use Reddit's JSON API with authentication
-                    url = f"https://oauth.reddit.com/r/{subreddit_name}/new"
-                    params = {"limit": 100}
+            page_matches = []
+            scanned = 0
+            with timed_stage("keyword_match"):
+                for post_data in children:
+                    post = post_data.get("data", {})
                     
-                    response = await client.get(url, params=params)
-                    response.raise_for_status()
-                    data = response.json()
+                    # Check if post is within time range
+                    if post.get("created_utc", 0) < cutoff_timestamp:
+                        break
+                    if seen_posts is not None:
+                        seen_posts.append(post)
                     
-                    for post_data in data.get("data", {}).get("children", []):
-                        post = post_data.get("data", {})
-                        
-                        # Check if post is within time range
-                        if post.get("created_utc", 0) < cutoff_timestamp:
-                            break
-                            
-                        text = f"{post.get('title', '')}\n{post.get('selftext', '')}"
-                        is_match, matched_keywords = matches(text, request.keywords)
-                        
-                        if is_match:
-                            reddit_id = post.get("id", "")
-                            created_utc = datetime.fromtimestamp(post.get("created_utc", 0))
-                            
-                            is_stale = False
-                            if reddit_id:
-                                is_stale = is_post_stale(db, reddit_id)
-                            
-                            result = RedditPost(
-                                title=post.get("title", ""),
-                                subreddit=post.get("subreddit", subreddit_name),
-                                url=f"https://reddit.com{post.get('permalink', '')}",
-                                created=created_utc.strftime("%Y-%m-%d %H:%M:%S"),
-                                keywords=matched_keywords,
-                                selftext=(post.get("selftext", "")[:200] + "...") if len(post.get("selftext", "")) > 200 else post.get("selftext", ""),
-                                score=post.get("score", 0),
-                                num_comments=post.get("num_comments", 0),
-                                reddit_id=reddit_id,
-                                is_stale=is_stale
-                            )
-                            results.append(result)
-                            
-                            # Mark as displayed if it's a new post
-                            if not is_stale and reddit_id:
-                                # Check if already in database to avoid duplicates
-                                existing = db.query(DisplayedPost).filter(DisplayedPost.reddit_id == reddit_id).first()
-                                if not existing:
-                                    mark_post_as_displayed(
-                                        db, reddit_id, post.get("title", ""), created_utc
-                                    )
-                                    new_posts_count += 1
-                        
-                        await asyncio.sleep(0.1)  # Rate limiting
-                        
-                except Exception as e:
-                    print(f"Error searching r/{subreddit_name}: {e}")
-                    continue
-            
-            search_time = time.time() - start_time
-            unique_subreddits = len(set(r.subreddit for r in results))
-            
-            return SearchResponse(
-                posts=results,
-                total_posts=len(results),
-                unique_subreddits=unique_subreddits,
-                search_time=search_time,
-                new_posts=new_posts_count
+                    scanned += 1
+                    text = f"{post.get('title', '')}\n{post.get('selftext', '')}"
+                    is_match, matched_keywords = matcher.match(text)
+                    if is_match:
+                        page_matches.append((post, matched_keywords))
+            POSTS_SCANNED.labels("reddit").inc(scanned)
+            POSTS_MATCHED.labels("reddit").inc(len(page_matches))
+            found.extend(page_matches)
+            if on_page is not None:
+                on_page(page_matches, pages)
+        complete = not truncated
+    except Exception as e:
+        print(f"Error searching r/{subreddit_name}: {e}")
+    finally:
+        if next_page is not None and not next_page.done():
+            next_page.cancel()
+    return found, truncated, complete
+
+def split_by_subreddit(subreddit_names: List[str], items: list, get_post: Callable) -> Dict[str, list]:
+    """Split combined-listing items back out per requested subreddit, keeping their order."""
+    by_key = {subreddit_name.lower(): subreddit_name for subreddit_name in subreddit_names}
+    split = {subreddit_name: [] for subreddit_name in subreddit_names}
+    for item in items:
+        subreddit_name = by_key.get(str(get_post(item).get("subreddit", "")).lower())
+        if subreddit_name is not None:
+            split[subreddit_name].append(item)
+    return split
+
+async def search_subreddits(
+    client: httpx.AsyncClient,
+    headers: dict,
+    subreddit_names: List[str],
+    matcher: KeywordMatcher,
+    cutoff_timestamp: int,
+    semaphore: asyncio.Semaphore,
+    on_page: Optional[Callable[[str, List[tuple[dict, List[str]]], int], None]] = None,
+    on_done: Optional[Callable[[str, bool, bool], None]] = None,
+    window_posts: Optional[Dict[str, List[dict]]] = None,
+) -> Dict[str, tuple[List[tuple[dict, List[str]]], bool, bool]]:
+    """Find keyword matches since the cutoff in each subreddit, by combined listings and the local corpus.
+    
+    Subreddits are grouped into combined r/a+b+c listings sized from their observed
+    post rates; a group that fails or runs out of pages is re-crawled one subreddit
+    at a time. Where the corpus already covers the window back to the cutoff, only
+    newer posts and those stored before their counts settled are fetched and the
+    rest is matched locally (reported to on_page as page 0). Every fetched post is added to
+    or refreshed in the corpus. on_done receives each
+    subreddit's truncation and failure flags once it is finished. window_posts, if
+    given, collects each subreddit's fetched posts inside the window plus, for a
+    covered window, its stored posts with comments. Returns the matches, newest
+    first, whether the page budget ran out, and whether its listing failed after
+    retries so the matches may be incomplete, by subreddit.
+    """
+    crawl_started = time.time()
+    coverages = await run_in_session(corpus.get_coverages, subreddit_names) if settings.corpus_enabled else {}
+    covered = {
+        subreddit_name for subreddit_name, coverage in coverages.items()
+        if coverage[0] <= cutoff_timestamp
+    }
+    if settings.corpus_enabled:
+        CACHE_LOOKUPS.labels("corpus", "hit").inc(len(covered))
+        CACHE_LOOKUPS.labels("corpus", "miss").inc(len(subreddit_names) - len(covered))
+    # Stored posts fetched while still gaining votes and comments are fetched again
+    unsettled = await run_in_session(corpus.get_unsettled_from, list(covered), cutoff_timestamp) if covered else {}
+    fetch_cutoffs = {
+        subreddit_name: max(cutoff_timestamp, min(coverages[subreddit_name][1], unsettled.get(subreddit_name, coverages[subreddit_name][1])))
+        if subreddit_name in covered else cutoff_timestamp
+        for subreddit_name in subreddit_names
+    }
+    results = {}
+    
+    async def finish(subreddit_name, found, truncated, complete, seen_posts, window_start):
+        if not complete and seen_posts:
+            window_start = min(post.get("created_utc", 0) for post in seen_posts)
+        if complete or seen_posts:
+            listing_planner.record_post_rate(subreddit_name, len(seen_posts), crawl_started - window_start)
+        elif not truncated:
+            listing_planner.record_listing_error(subreddit_name)
+        
+        if subreddit_name in covered:
+            fetched_ids = {post.get("id") for post, _ in found}
+            local = await run_in_session(
+                corpus.search_corpus, subreddit_name, matcher, cutoff_timestamp, fetch_cutoffs[subreddit_name]
+            )
+            local = [item for item in local if item[0].get("id") not in fetched_ids]
+            if local and on_page is not None:
+                on_page(subreddit_name, local, 0)
+            found = found + local
+        
+        if window_posts is not None:
+            stored = []
+            if subreddit_name in covered:
+                stored = await run_in_session(
+                    corpus.get_commented_posts, subreddit_name, cutoff_timestamp, fetch_cutoffs[subreddit_name],
+                    max(0, settings.comment_scan_request_budget),
+                )
+            window_posts[subreddit_name] = seen_posts + stored
+        
+        # Record the window that is now contiguous in the corpus
+        if settings.corpus_enabled and (complete or seen_posts):
+            if subreddit_name in covered and (complete or window_start <= coverages[subreddit_name][1]):
+                covered_from = coverages[subreddit_name][0]
+            elif not complete:
+                covered_from = window_start
+            else:
+                covered_from = cutoff_timestamp
+            try:
+                await run_in_session(corpus.store_posts, subreddit_name, seen_posts, covered_from, crawl_started)
+            except Exception as e:
+                print(f"Error storing r/{subreddit_name} in the corpus: {e}")
+        
+        failed = not complete and not truncated
+        results[subreddit_name] = (found, truncated, failed)
+        if on_done is not None:
+            on_done(subreddit_name, truncated, failed)
+    
+    async def crawl_one(subreddit_name):
+        seen_posts: List[dict] = []
+        found, truncated, complete = await fetch_subreddit_matches(
+            client, headers, subreddit_name, matcher, fetch_cutoffs[subreddit_name], semaphore,
+            on_page=(lambda page_matches, pages: on_page(subreddit_name, page_matches, pages)) if on_page else None,
+            seen_posts=seen_posts,
+        )
+        await finish(subreddit_name, found, truncated, complete, seen_posts, fetch_cutoffs[subreddit_name])
+    
+    async def crawl_group(group):
+        if len(group) == 1:
+            await crawl_one(group[0])
+            return
+        
+        # Combined listings are buffered so a failed group can be retried without duplicate pages
+        group_cutoff = min(fetch_cutoffs[subreddit_name] for subreddit_name in group)
+        seen_posts: List[dict] = []
+        pages = 0
+        def count_page(_, page):
+            nonlocal pages
+            pages = page
+        found, _, complete = await fetch_subreddit_matches(
+            client, headers, "+".join(group), matcher, group_cutoff, semaphore, on_page=count_page, seen_posts=seen_posts
+        )
+        if not complete:
+            await asyncio.gather(*(crawl_one(subreddit_name) for subreddit_name in group))
+            return
+        
+        found_by_subreddit = split_by_subreddit(group, found, lambda item: item[0])
+        seen_by_subreddit = split_by_subreddit(group, seen_posts, lambda post: post)
+        for subreddit_name in group:
+            if found_by_subreddit[subreddit_name] and on_page is not None:
+                on_page(subreddit_name, found_by_subreddit[subreddit_name], pages)
+            await finish(
+                subreddit_name, found_by_subreddit[subreddit_name], False, True,
+                seen_by_subreddit[subreddit_name], group_cutoff,
+            )
+    
+    groups = listing_planner.plan_listing_groups({
+        subreddit_name: crawl_started - fetch_cutoffs[subreddit_name] for subreddit_name in subreddit_names
+    })
+    await asyncio.gather(*(crawl_group(group) for group in groups))
+    return results
+
+def get_cutoff_timestamp(days_back: int) -> int:
+    """Calculate timestamp for specified days back."""
+    cutoff_time = datetime.now(timezone.utc) - timedelta(days=days_back)
+    return int(cutoff_time.timestamp())
+
+def build_reddit_posts(
+    subreddit_name: str,
+    found: List[tuple[dict, List[str]]],
+    displayed_at: Dict[str, datetime],
+    stale_threshold: datetime,
+    new_rows: Dict[str, dict],
+    comment_matches: Optional[Dict[str, List[tuple[dict, List[str]]]]] = None,
+    request_keywords: Optional[List[str]] = None,
+) -> List[RedditPost]:
+    """Turn raw matched listing items into RedditPosts and queue never-displayed ones in new_rows.
+    
+    With request_keywords, matched keywords are reported as that list orders and spells them.
+    """
+    results = []
+    for post, matched_keywords in found:
+        if request_keywords is not None:
+            matched_keywords = restore_keywords(request_keywords, matched_keywords)
+        reddit_id = post.get("id", "")
+        created_utc = datetime.fromtimestamp(post.get("created_utc", 0))
+        
+        first_displayed = displayed_at.get(reddit_id)
+        is_stale = first_displayed is not None and first_displayed < stale_threshold
+        
+        selftext = post.get("selftext") or ""
+        result = RedditPost(
+            title=post.get("title", ""),
+            subreddit=post.get("subreddit", subreddit_name),
+            url=f"https://reddit.com{post.get('permalink', '')}",
+            created=created_utc.isoformat(" ", "seconds"),  # Same text as strftime("%Y-%m-%d %H:%M:%S"), about 3x faster
+            keywords=matched_keywords,
+            selftext=(selftext[:200] + "...") if len(selftext) > 200 else selftext,
+            score=post.get("score", 0),
+            num_comments=post.get("num_comments", 0),
+            reddit_id=reddit_id,
+            is_stale=is_stale,
+            matched_comments=(
+                build_matched_comments(comment_matches.get(reddit_id, []), request_keywords) if comment_matches else []
+            )
+        )
+        results.append(result)
+        
+        # Queue never-displayed posts for the bulk insert
+        if reddit_id and first_displayed is None and reddit_id not in new_rows:
+            new_rows[reddit_id] = {
+                "reddit_id": reddit_id,
+                "title": post.get("title", ""),
+                "created_utc": created_utc,
+                "simhash": None,
+            }
+    return results
+
+def build_matched_comments(
+    matches: List[tuple[dict, List[str]]],
+    request_keywords: Optional[List[str]] = None,
+) -> List[MatchedComment]:
+    """Turn a post's matched raw comments into MatchedComments."""
+    results = []
+    for comment, matched_keywords in matches:
+        if request_keywords is not None:
+            matched_keywords = restore_keywords(request_keywords, matched_keywords)
+        body = comment["body"]
+        results.append(MatchedComment(
+            comment_id=comment["id"],
+            author=comment.get("author"),
+            body=(body[:200] + "...") if len(body) > 200 else body,
+            url=f"https://reddit.com{comment.get('permalink', '')}",
+            score=comment.get("score", 0),
+            created=datetime.fromtimestamp(comment.get("created_utc", 0)).isoformat(" ", "seconds"),
+            keywords=matched_keywords,
+        ))
+    return results
+
+def get_comment_only_matches(
+    window_posts: List[dict],
+    comment_matches: Dict[str, List[tuple[dict, List[str]]]],
+    matched_ids: Set[str],
+) -> List[tuple[dict, List[str]]]:
+    """Listing items for window posts not in matched_ids that only their comments matched, newest first.
+    
+    Their keywords are those found in the comments, in the order they were first matched.
+    """
+    extra = {}
+    for post in window_posts:
+        reddit_id = post.get("id")
+        if reddit_id in comment_matches and reddit_id not in matched_ids and reddit_id not in extra:
+            keywords = [keyword for _, matched_keywords in comment_matches[reddit_id] for keyword in matched_keywords]
+            extra[reddit_id] = (post, list(dict.fromkeys(keywords)))
+    return sorted(extra.values(), key=lambda item: -item[0].get("created_utc", 0))
+
+def get_crosspost_parents(found: List[tuple[dict, List[str]]]) -> Dict[str, str]:
+    """Map cross-posts among raw matched listing items to the id of the post they were cross-posted from."""
+    return {
+        post["id"]: post["crosspost_parent"].split("_", 1)[-1]
+        for post, _ in found
+        if post.get("id") and post.get("crosspost_parent")
+    }
+
+def fingerprint_posts(results: List[RedditPost], new_rows: Dict[str, dict]) -> List[int]:
+    """SimHash each post's title and selftext, storing it on the post's queued displayed_posts row."""
+    with timed_stage("fingerprint"):
+        fingerprints = dedupe.simhash_texts([f"{post.title}\n{post.selftext or ''}" for post in results]).tolist()
+    for post, fingerprint in zip(results, fingerprints):
+        if post.reddit_id in new_rows and fingerprint:
+            new_rows[post.reddit_id]["simhash"] = fingerprint
+    return fingerprints
+
+def find_recent_duplicate(seen_posts: Optional[SeenPostIndex], post: RedditPost, fingerprint: int) -> Optional[str]:
+    """Return a recently displayed post the given post near-duplicates."""
+    if seen_posts is None or settings.duplicate_max_distance < 0:
+        return None
+    return seen_posts.find_near_duplicate(fingerprint, exclude=post.reddit_id)
+
+def collapse_duplicate_posts(
+    results: List[RedditPost],
+    fingerprints: List[int],
+    crosspost_parents: Dict[str, str],
+    new_rows: Dict[str, dict],
+    seen_posts: Optional[SeenPostIndex],
+) -> List[RedditPost]:
+    """Nest near-duplicates and cross-posts under one representative per group.
+    
+    The representative is the group's highest-scoring post, listed where the group
+    first appears. A never-displayed representative that near-duplicates a recently
+    displayed post is marked duplicate_of it.
+    """
+    keys = [crosspost_parents.get(post.reddit_id, post.reddit_id) for post in results]
+    collapsed = []
+    for group in dedupe.group_near_duplicates(fingerprints, settings.duplicate_max_distance, keys):
+        representative = max(group, key=lambda index: results[index].score)
+        post = results[representative]
+        post.duplicates = [
+            DuplicatePost(
+                title=results[index].title,
+                subreddit=results[index].subreddit,
+                url=results[index].url,
+                score=results[index].score,
+                num_comments=results[index].num_comments,
+                reddit_id=results[index].reddit_id,
             )
+            for index in group if index != representative
+        ]
+        post.matched_comments = [comment for index in group for comment in results[index].matched_comments]
+        if post.reddit_id in new_rows:
+            post.duplicate_of = find_recent_duplicate(seen_posts, post, fingerprints[representative])
+        collapsed.append(post)
+    return collapsed
+
+def mark_stream_duplicates(
+    results: List[RedditPost],
+    fingerprints: List[int],
+    crosspost_parents: Dict[str, str],
+    emitted: dedupe.FingerprintBuckets,
+    emitted_by_key: Dict[str, str],
+    new_rows: Dict[str, dict],
+    seen_posts: Optional[SeenPostIndex],
+):
+    """Mark streamed posts that near-duplicate or cross-post an already streamed or recently displayed post."""
+    for post, fingerprint in zip(results, fingerprints):
+        key = crosspost_parents.get(post.reddit_id, post.reddit_id)
+        earlier = emitted_by_key.get(key)
+        if earlier is None or earlier == post.reddit_id:
+            matches = emitted.matches(fingerprint) if settings.duplicate_max_distance >= 0 else []
+            earlier = next((reddit_id for reddit_id in matches if reddit_id != post.reddit_id), None)
+        if earlier is None and post.reddit_id in new_rows:
+            earlier = find_recent_duplicate(seen_posts, post, fingerprint)
+        post.duplicate_of = earlier
+        if earlier is None:
+            emitted_by_key.setdefault(key, post.reddit_id)
+            emitted.add(post.reddit_id, fingerprint)
+
+def restore_keywords(request_keywords: List[str], matched_keywords: List[str]) -> List[str]:
+    """Map keywords matched through a normalized search cache key back to the request's own order and spelling."""
+    matched = set(matched_keywords)
+    return [keyword for keyword in request_keywords if keyword.strip() in matched]
+
+def get_comment_budget(request: SearchRequest) -> int:
+    """Comment requests a search may make: none unless it scans comments, and never above the configured budget."""
+    if not request.scan_comments:
+        return 0
+    budget = max(0, settings.comment_scan_request_budget)
+    return budget if request.comment_budget is None else max(0, min(request.comment_budget, budget))
+
+def get_requested_subreddits(request: SearchRequest) -> Dict[str, str]:
+    """Map each normalized subreddit name to its first spelling in the request, in request order."""
+    requested: Dict[str, str] = {}
+    for subreddit_name in request.subreddits:
+        requested.setdefault(subreddit_name.strip().lower(), subreddit_name)
+    return requested
+
+def get_search_cache_key(request: SearchRequest) -> tuple:
+    """Normalize a search so equivalent requests share one cache entry."""
+    return (
+        tuple(sorted(set(keyword.strip() for keyword in request.keywords))),
+        tuple(sorted(get_requested_subreddits(request))),
+        request.days_back,
+        request.whole_word,
+        get_comment_budget(request),
+    )
+
+async def crawl_subreddits(
+    app,
+    client: httpx.AsyncClient,
+    cache_key: tuple,
+) -> tuple[Dict[str, tuple[List[tuple[dict, List[str]]], bool, bool]], Optional[comments.CommentScan]]:
+    """Crawl every subreddit of a normalized search and return matches, truncation and failure by subreddit.
+    
+    With a comment budget, posts that only their comments matched are added to the
+    matches and the comment scan is returned alongside.
+    """
+    keywords, subreddit_names, days_back, whole_word, comment_budget = cache_key
+    
+    # Get Reddit access token (cached across requests)
+    access_token = await get_reddit_access_token(app)
+    headers = reddit_auth_headers(access_token)
+    
+    cutoff_timestamp = get_cutoff_timestamp(days_back)
+    
+    # Compile the keyword set once per request (automata are shared through an LRU)
+    matcher = KeywordMatcher(list(keywords), whole_word=whole_word)
+    
+    # Fetch subreddits concurrently, several per request where their traffic allows
+    semaphore = asyncio.Semaphore(max(1, settings.reddit_max_concurrency))
+    window_posts = {} if comment_budget else None
+    crawled = await search_subreddits(
+        client, headers, list(subreddit_names), matcher, cutoff_timestamp, semaphore, window_posts=window_posts
+    )
+    if not comment_budget:
+        return crawled, None
+    
+    # Scan comment threads once the listings are done so the budget is shared fairly across subreddits
+    matched_ids = {post.get("id") for found, _, _ in crawled.values() for post, _ in found}
+    comment_scan = await comments.scan_comments(
+        client, headers, window_posts, matched_ids, matcher, semaphore, comment_budget
+    )
+    for subreddit_name, (found, truncated, failed) in crawled.items():
+        extra = get_comment_only_matches(window_posts.get(subreddit_name, []), comment_scan.matches, matched_ids)
+        if extra:
+            found = sorted(found + extra, key=lambda item: -item[0].get("created_utc", 0))
+            crawled[subreddit_name] = (found, truncated, failed)
+    return crawled, comment_scan
+
+@router.post(
+    "/search",
+    response_model=SearchResponse,
+    response_class=ModelJSONResponse,
+    dependencies=[Depends(profile_request)],
+)
+async def search_reddit(request: SearchRequest, req: Request, response: Response, db: ThreadpoolSession = Depends(get_db)):
+    """Search Reddit for posts matching keywords."""
+    try:
+        start_time = time.time()
+        timings = start_request_timings() if request.include_timings else None
+        client = get_reddit_client(req)
+        
+        # Identical searches share cached or in-flight crawls; only display state is per request
+        cache_key = get_search_cache_key(request)
+        search_cache = getattr(req.app.state, "search_cache", None)
+        load = lambda: crawl_subreddits(req.app, client, cache_key)
+        crawled, comment_scan = await (search_cache.get(cache_key, load) if search_cache is not None else load())
+        comment_matches = comment_scan.matches if comment_scan is not None else {}
+        
+        # Merge in request order so the response is deterministic; a subreddit requested twice is listed once
+        requested = get_requested_subreddits(request)
+        per_subreddit = [crawled[key] for key in requested]
+        truncated_subreddits = [
+            subreddit_name
+            for subreddit_name, (_, truncated, _) in zip(requested.values(), per_subreddit)
+            if truncated
+        ]
+        failed_subreddits = [
+            subreddit_name
+            for subreddit_name, (_, _, failed) in zip(requested.values(), per_subreddit)
+            if failed
+        ]
+        
+        # One batched lookup for every matched post instead of per-post queries
+        seen_posts = getattr(req.app.state, "seen_posts", None)
+        displayed_at = await lookup_displayed_at(db, seen_posts, [
+            post.get("id") for found, _, _ in per_subreddit for post, _ in found if post.get("id")
+        ])
+        stale_threshold = get_stale_threshold()
+        new_rows = {}
+        
+        results = []
+        for subreddit_name, (found, _, _) in zip(requested.values(), per_subreddit):
+            results.extend(build_reddit_posts(
+                subreddit_name, found, displayed_at, stale_threshold, new_rows, comment_matches, request.keywords
+            ))
+        unique_subreddits = len(set(r.subreddit for r in results))
+        
+        # Show each story once, with its near-duplicates and cross-posts nested under it
+        fingerprints = fingerprint_posts(results, new_rows)
+        matched_posts = len(results)
+        if request.collapse_duplicates:
+            crosspost_parents = get_crosspost_parents([item for found, _, _ in per_subreddit for item in found])
+            results = collapse_duplicate_posts(results, fingerprints, crosspost_parents, new_rows, seen_posts)
+        
+        await record_displayed_posts(db, seen_posts, list(new_rows.values()))
+        
+        search_time = time.time() - start_time
+        record_stage("search_total", search_time)
+        
+        # Posts are already validated RedditPosts; serialize them without another response_model pass
+        return model_json_response(SearchResponse(
+            posts=results,
+            total_posts=len(results),
+            unique_subreddits=unique_subreddits,
+            search_time=search_time,
+            new_posts=len(new_rows),
+            truncated_subreddits=truncated_subreddits,
+            failed_subreddits=failed_subreddits,
+            collapsed_posts=matched_posts - len(results),
+            matched_comments=sum(len(post.matched_comments) for post in results),
+            comment_requests=comment_scan.requests if comment_scan is not None else 0,
+            comment_scan_truncated=comment_scan is not None and comment_scan.truncated,
+            timings=round_timings(timings)
+        ), response)
         
     except HTTPException as e:
         # Preserve HTTPException details
@@ -182,6 +712,156 @@ async def search_reddit(request: SearchRequest, req: Request, db: Session = Depe
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search failed: {e}")
 
+async def stream_search_events(
+    request: SearchRequest,
+    client: httpx.AsyncClient,
+    headers: dict,
+    start_time: float,
+    seen_posts: Optional[SeenPostIndex] = None,
+):
+    """Yield post, progress and summary events while subreddits are crawled concurrently."""
+    # The request-scoped session is closed once the endpoint returns, so the stream owns its own
+    db = ThreadpoolSession(SessionLocal())
+    cutoff_timestamp = get_cutoff_timestamp(request.days_back)
+    matcher = KeywordMatcher(request.keywords, whole_word=request.whole_word)
+    semaphore = asyncio.Semaphore(max(1, settings.reddit_max_concurrency))
+    queue: asyncio.Queue = asyncio.Queue()
+    
+    comment_budget = get_comment_budget(request)
+    window_posts = {} if comment_budget else None
+    
+    # Crawl each subreddit once even if it was requested twice, in any case or spacing
+    requested = get_requested_subreddits(request)
+    subreddit_names = list(requested)
+    crawl = asyncio.create_task(search_subreddits(
+        client, headers, subreddit_names, matcher, cutoff_timestamp, semaphore,
+        on_page=lambda subreddit_name, page_matches, pages: queue.put_nowait(("page", subreddit_name, page_matches, pages)),
+        on_done=lambda subreddit_name, truncated, failed: queue.put_nowait(("done", subreddit_name, (truncated, failed), None)),
+        window_posts=window_posts,
+    ))
+    crawl.add_done_callback(
+        lambda task: queue.put_nowait(("failed", None, task.exception(), None))
+        if not task.cancelled() and task.exception() is not None else None
+    )
+    try:
+        stale_threshold = get_stale_threshold()
+        new_rows = {}
+        total_posts = 0
+        collapsed_posts = 0
+        pages_by_subreddit = {}
+        subreddits_with_posts = set()
+        truncated_subreddits = []
+        failed_subreddits = []
+        remaining = len(subreddit_names)
+        emitted = dedupe.FingerprintBuckets(settings.duplicate_max_distance)
+        emitted_by_key: Dict[str, str] = {}
+        streamed_ids: Set[str] = set()
+        
+        async def build_page(subreddit_name, items, comment_matches=None):
+            displayed_at = await lookup_displayed_at(db, seen_posts, [post.get("id") for post, _ in items if post.get("id")])
+            page_results = build_reddit_posts(subreddit_name, items, displayed_at, stale_threshold, new_rows, comment_matches)
+            fingerprints = fingerprint_posts(page_results, new_rows)
+            if request.collapse_duplicates:
+                mark_stream_duplicates(
+                    page_results, fingerprints, get_crosspost_parents(items),
+                    emitted, emitted_by_key, new_rows, seen_posts,
+                )
+            streamed_ids.update(post.get("id") for post, _ in items)
+            return page_results
+        
+        while remaining:
+            kind, subreddit_name, payload, pages = await queue.get()
+            if kind == "failed":
+                raise payload
+            if kind == "page":
+                # Locally matched posts arrive as page 0 and must not reset the count
+                pages_by_subreddit[subreddit_name] = max(pages, pages_by_subreddit.get(subreddit_name, 0))
+                for result in await build_page(subreddit_name, payload):
+                    total_posts += 1
+                    collapsed_posts += result.duplicate_of is not None
+                    subreddits_with_posts.add(result.subreddit)
+                    yield ndjson_event("post", result.model_dump())
+                yield ndjson_event("progress", {
+                    "subreddit": subreddit_name,
+                    "pages": pages,
+                    "matches": len(payload),
+                    "done": False,
+                })
+            else:
+                remaining -= 1
+                truncated, failed = payload
+                if truncated:
+                    truncated_subreddits.append(subreddit_name)
+                if failed:
+                    failed_subreddits.append(subreddit_name)
+                yield ndjson_event("progress", {
+                    "subreddit": subreddit_name,
+                    "pages": pages_by_subreddit.get(subreddit_name, 0),
+                    "truncated": truncated,
+                    "failed": failed,
+                    "done": True,
+                })
+        
+        # Comments are scanned once every listing is done; streamed posts get their matches as comments events
+        comment_scan = None
+        if comment_budget:
+            comment_scan = await comments.scan_comments(
+                client, headers, window_posts, streamed_ids, matcher, semaphore, comment_budget
+            )
+            for reddit_id, matches in comment_scan.matches.items():
+                if reddit_id in streamed_ids:
+                    yield ndjson_event("comments", {
+                        "reddit_id": reddit_id,
+                        "comments": [comment.model_dump() for comment in build_matched_comments(matches)],
+                    })
+            for subreddit_name in subreddit_names:
+                extra = get_comment_only_matches(window_posts.get(subreddit_name, []), comment_scan.matches, streamed_ids)
+                if not extra:
+                    continue
+                for result in await build_page(subreddit_name, extra, comment_scan.matches):
+                    total_posts += 1
+                    collapsed_posts += result.duplicate_of is not None
+                    subreddits_with_posts.add(result.subreddit)
+                    yield ndjson_event("post", result.model_dump())
+        
+        await record_displayed_posts(db, seen_posts, list(new_rows.values()))
+        
+        # Report truncation and failures in request order, like the non-streaming response
+        summary = SearchResponse(
+            posts=[],
+            total_posts=total_posts,
+            unique_subreddits=len(subreddits_with_posts),
+            search_time=time.time() - start_time,
+            new_posts=len(new_rows),
+            truncated_subreddits=[name for key, name in requested.items() if key in truncated_subreddits],
+            failed_subreddits=[name for key, name in requested.items() if key in failed_subreddits],
+            collapsed_posts=collapsed_posts,
+            matched_comments=sum(len(matches) for matches in comment_scan.matches.values()) if comment_scan else 0,
+            comment_requests=comment_scan.requests if comment_scan else 0,
+            comment_scan_truncated=comment_scan is not None and comment_scan.truncated
+        )
+        yield ndjson_event("summary", summary.model_dump(exclude={"posts"}))
+    except Exception as e:
+        yield ndjson_event("error", {"detail": f"Search failed: {e}"})
+    finally:
+        crawl.cancel()
+        await db.close()
+
+@router.post("/search/stream")
+async def search_reddit_stream(request: SearchRequest, req: Request):
+    """Stream matching posts as newline-delimited JSON while the search runs."""
+    start_time = time.time()
+    
+    # Resolve credentials up front so configuration errors still surface as HTTP errors
+    access_token = await get_reddit_access_token(req.app)
+    client = get_reddit_client(req)
+    headers = reddit_auth_headers(access_token)
+    
+    return StreamingResponse(
+        stream_search_events(request, client, headers, start_time, getattr(req.app.state, "seen_posts", None)),
+        media_type=NDJSON_MEDIA_TYPE,
+    )
+
 @router.get("/health")
 async def reddit_health(req: Request):
     """Check if Reddit client is working."""
@@ -194,17 +874,17 @@ async def reddit_health(req: Request):
             }
         
         # Get access token and test connection
-        access_token = await get_reddit_access_token()
-        headers = {
-            "Authorization": f"Bearer {access_token}",
-            "User-Agent": settings.reddit_user_agent or "RedditAgent/1.0 by /u/yourusername"
-        }
+        access_token = await get_reddit_access_token(req.app)
+        client = get_reddit_client(req)
         
-        async with httpx.AsyncClient(headers=headers, timeout=30.0) as client:
-            # Test connection with a simple Reddit API call
-            response = await client.get("https://oauth.reddit.com/r/Python/hot", params={"limit": 1})
-            response.raise_for_status()
-            return {"status": "healthy", "message": "Reddit client is working"}
+        # Test connection with a simple Reddit API call
+        response = await client.get(
+            f"{REDDIT_API_BASE}/r/Python/hot",
+            params={"limit": 1},
+            headers=reddit_auth_headers(access_token),
+        )
+        response.raise_for_status()
+        return {"status": "healthy", "message": "Reddit client is working"}
     except HTTPException as e:
         return {
             "status": "error", 
@@ -217,10 +897,20 @@ async def reddit_health(req: Request):
         }
 
 @router.get("/displayed-posts")
-async def get_displayed_posts(db: Session = Depends(get_db), limit: int = 50):
-    """Get list of displayed posts from database."""
+async def get_displayed_posts(db: ThreadpoolSession = Depends(get_db), limit: int = 50, cursor: Optional[str] = None):
+    """Get a page of displayed posts, newest first; pass next_cursor back as cursor for the next page."""
     try:
-        posts = db.query(DisplayedPost).order_by(DisplayedPost.displayed_at.desc()).limit(limit).all()
+        limit = max(1, min(limit, MAX_DISPLAYED_POSTS_PAGE))
+        after = decode_displayed_posts_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        # One extra row tells whether another page follows
+        posts = await db.run(get_recent_displayed_posts, limit + 1, after)
+        next_cursor = encode_displayed_posts_cursor(posts[limit - 1]) if len(posts) > limit else None
+        posts = posts[:limit]
+        stale_threshold = get_stale_threshold()
         return {
             "posts": [
                 {
@@ -229,25 +919,27 @@ async def get_displayed_posts(db: Session = Depends(get_db), limit: int = 50):
                     "title": post.title,
                     "created_utc": post.created_utc.isoformat(),
                     "displayed_at": post.displayed_at.isoformat(),
-                    "is_stale": is_post_stale(db, post.reddit_id)
+                    "is_stale": post.displayed_at < stale_threshold
                 }
                 for post in posts
             ],
-            "total": len(posts)
+            "total": len(posts),
+            "next_cursor": next_cursor
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get displayed posts: {e}")
 
 @router.delete("/displayed-posts/{reddit_id}")
-async def clear_displayed_post(reddit_id: str, db: Session = Depends(get_db)):
+async def clear_displayed_post(reddit_id: str, req: Request, db: ThreadpoolSession = Depends(get_db)):
     """Remove a post from displayed posts (mark as not displayed)."""
     try:
-        post = db.query(DisplayedPost).filter(DisplayedPost.reddit_id == reddit_id).first()
-        if not post:
+        deleted = await db.run(delete_displayed_post, reddit_id)
+        seen_posts = getattr(req.app.state, "seen_posts", None)
+        if seen_posts is not None:
+            seen_posts.discard(reddit_id)
+        if not deleted:
             raise HTTPException(status_code=404, detail="Post not found in displayed posts")
         
-        db.delete(post)
-        db.commit()
         return {"message": f"Post {reddit_id} removed from displayed posts"}
     except HTTPException:
         raise
@@ -255,21 +947,17 @@ async def clear_displayed_post(reddit_id: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Failed to remove post: {e}")
 
 @router.get("/displayed-posts/stats")
-async def get_displayed_posts_stats(db: Session = Depends(get_db)):
+async def get_displayed_posts_stats(db: ThreadpoolSession = Depends(get_db)):
     """Get statistics about displayed posts."""
     try:
-        total_posts = db.query(DisplayedPost).count()
-        
-        from datetime import timedelta
-        stale_threshold = datetime.utcnow() - timedelta(hours=72)
-        stale_posts = db.query(DisplayedPost).filter(DisplayedPost.displayed_at < stale_threshold).count()
+        total_posts, stale_posts = await db.run(count_displayed_posts, get_stale_threshold())
         fresh_posts = total_posts - stale_posts
         
         return {
             "total_displayed_posts": total_posts,
             "fresh_posts": fresh_posts,
             "stale_posts": stale_posts,
-            "stale_threshold_hours": 72
+            "stale_threshold_hours": STALE_THRESHOLD_HOURS
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get stats: {e}")
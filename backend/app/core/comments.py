@@ -0,0 +1,240 @@
+import asyncio
+import time
+from collections import OrderedDict
+from itertools import zip_longest
+from typing import Dict, List, Optional, Set
+
+import httpx
+
+from app.core.config import settings
+from app.core.matcher import KeywordMatcher
+from app.core.metrics import CACHE_LOOKUPS, POSTS_MATCHED, POSTS_SCANNED, timed_stage
+from app.core.reddit_client import REDDIT_API_BASE
+
+# /api/morechildren expands at most this many comment ids per request
+MORE_CHILDREN_BATCH = 100
+
+# Comment trees by post id: (comment count when fetched, fetch time, comments, ids behind unexpanded "more" stubs)
+_trees: "OrderedDict[str, tuple[int, float, List[dict], List[str]]]" = OrderedDict()
+_cached_comments = 0  # Comments held across all stored trees
+
+def get_cached_tree(post: dict) -> Optional[tuple[List[dict], List[str]]]:
+    """Return a post's stored comment tree if it is still current.
+    
+    A comment count observed since the tree was fetched must equal the tree's. Posts
+    served from the corpus carry the time their count was stored (counted_at); a
+    count older than the tree cannot reveal new comments, so such a tree is only
+    trusted for COMMENT_CACHE_UNVERIFIED_SECONDS.
+    """
+    entry = _trees.get(post["id"])
+    if entry is None:
+        return None
+    count, fetched_at, comments, more_ids = entry
+    counted_at = post.get("counted_at")
+    if counted_at is not None and counted_at < fetched_at:
+        if time.time() - fetched_at > settings.comment_cache_unverified_seconds:
+            return None
+    elif count != post.get("num_comments", 0):
+        return None
+    _trees.move_to_end(post["id"])
+    return comments, more_ids
+
+def store_tree(post: dict, comments: List[dict], more_ids: List[str], expanded: bool = False):
+    """Store a post's comment tree, evicting the least recently used trees beyond the comment limit.
+    
+    An expanded tree keeps the fetch time of the tree it extends.
+    """
+    global _cached_comments
+    previous = _trees.pop(post["id"], None)
+    fetched_at = time.time()
+    if previous is not None:
+        _cached_comments -= len(previous[2])
+        if expanded:
+            fetched_at = previous[1]
+    _trees[post["id"]] = (post.get("num_comments", 0), fetched_at, comments, more_ids)
+    _cached_comments += len(comments)
+    while _trees and _cached_comments > max(0, settings.comment_cache_max_comments):
+        _, evicted = _trees.popitem(last=False)
+        _cached_comments -= len(evicted[2])
+
+def flatten_comments(things: list) -> tuple[List[dict], List[str]]:
+    """Walk comment listing things depth first, returning the comments and the ids behind "more" stubs."""
+    comments: List[dict] = []
+    more_ids: List[str] = []
+    stack = list(reversed(things))
+    while stack:
+        thing = stack.pop()
+        data = thing.get("data", {})
+        if thing.get("kind") == "more":
+            # "Continue this thread" stubs carry no ids and are not expanded
+            more_ids.extend(child for child in data.get("children", []) if child)
+        elif thing.get("kind") == "t1":
+            comments.append({
+                "id": data.get("id", ""),
+                "body": data.get("body") or "",
+                "author": data.get("author"),
+                "score": data.get("score", 0),
+                "created_utc": data.get("created_utc", 0),
+                "permalink": data.get("permalink", ""),
+            })
+            replies = data.get("replies")
+            if isinstance(replies, dict):
+                stack.extend(reversed(replies.get("data", {}).get("children", [])))
+    return comments, more_ids
+
+async def fetch_comment_tree(
+    client: httpx.AsyncClient,
+    headers: dict,
+    post_id: str,
+    semaphore: asyncio.Semaphore,
+) -> tuple[List[dict], List[str]]:
+    """Fetch a post's comment tree in one request; comments past the limit come back as "more" ids."""
+    params = {"limit": settings.comment_scan_comments_per_post}
+    async with semaphore:
+        with timed_stage("reddit_comments"):
+            response = await client.get(f"{REDDIT_API_BASE}/comments/{post_id}", params=params, headers=headers)
+        response.raise_for_status()
+        data = response.json()
+    # The response is [post listing, comment listing]
+    if not isinstance(data, list) or len(data) < 2:
+        return [], []
+    return flatten_comments(data[1].get("data", {}).get("children", []))
+
+async def fetch_more_comments(
+    client: httpx.AsyncClient,
+    headers: dict,
+    post_id: str,
+    comment_ids: List[str],
+    semaphore: asyncio.Semaphore,
+) -> tuple[List[dict], List[str]]:
+    """Expand up to MORE_CHILDREN_BATCH ids from a post's "more" stubs."""
+    params = {
+        "link_id": f"t3_{post_id}",
+        "children": ",".join(comment_ids),
+        "api_type": "json",
+        "limit_children": "false",
+    }
+    async with semaphore:
+        with timed_stage("reddit_comments"):
+            response = await client.get(f"{REDDIT_API_BASE}/api/morechildren", params=params, headers=headers)
+        response.raise_for_status()
+        data = response.json()
+    return flatten_comments(data.get("json", {}).get("data", {}).get("things", []))
+
+def order_candidates(candidates: Dict[str, List[dict]], matched_ids: Set[str]) -> List[dict]:
+    """Order posts with comments for scanning, taking turns between subreddits.
+
+    Within a subreddit, posts the search has not matched yet come first, most
+    commented first, so one busy subreddit cannot spend the whole budget.
+    """
+    seen: Set[str] = set()
+    queues = []
+    for posts in candidates.values():
+        queue = []
+        for post in posts:
+            if post.get("id") and post.get("num_comments", 0) > 0 and post["id"] not in seen:
+                seen.add(post["id"])
+                queue.append(post)
+        queue.sort(key=lambda post: (post["id"] in matched_ids, -post.get("num_comments", 0)))
+        queues.append(queue)
+    return [post for turn in zip_longest(*queues) for post in turn if post is not None]
+
+class CommentScan:
+    """Comments matched by a scan, by post id, and the requests spent out of its budget."""
+
+    def __init__(self, budget: int):
+        self.budget = max(0, budget)
+        self.requests = 0
+        self.truncated = False  # Candidates or "more" stubs were left unscanned when the budget ran out
+        self.matches: Dict[str, List[tuple[dict, List[str]]]] = {}
+
+    def take_request(self) -> bool:
+        if self.requests >= self.budget:
+            self.truncated = True
+            return False
+        self.requests += 1
+        return True
+
+    def match(self, post_id: str, comments: List[dict], matcher: KeywordMatcher):
+        with timed_stage("comment_match"):
+            found = []
+            for comment in comments:
+                is_match, matched_keywords = matcher.match(comment["body"])
+                if is_match:
+                    found.append((comment, matched_keywords))
+        POSTS_SCANNED.labels("comments").inc(len(comments))
+        POSTS_MATCHED.labels("comments").inc(len(found))
+        if found:
+            self.matches.setdefault(post_id, []).extend(found)
+
+async def scan_comments(
+    client: httpx.AsyncClient,
+    headers: dict,
+    candidates: Dict[str, List[dict]],
+    matched_ids: Set[str],
+    matcher: KeywordMatcher,
+    semaphore: asyncio.Semaphore,
+    budget: int,
+) -> CommentScan:
+    """Match keywords against the comments of candidate posts, by subreddit, within a request budget.
+
+    Each candidate's tree is fetched with one request, concurrently, unless a stored
+    tree is still current. Budget left over then expands "more" stubs, one batch per
+    post per round, but only for posts that neither the search nor their comments
+    have matched yet. Failed fetches are logged and skipped.
+    """
+    scan = CommentScan(budget)
+    trees: Dict[str, tuple[dict, List[dict], List[str]]] = {}
+    to_fetch = []
+    for post in order_candidates(candidates, matched_ids):
+        cached = get_cached_tree(post)
+        if cached is not None:
+            trees[post["id"]] = (post, *cached)
+        elif scan.take_request():
+            to_fetch.append(post)
+    CACHE_LOOKUPS.labels("comments", "hit").inc(len(trees))
+    CACHE_LOOKUPS.labels("comments", "miss").inc(len(to_fetch))
+
+    async def fetch_tree(post):
+        try:
+            comments, more_ids = await fetch_comment_tree(client, headers, post["id"], semaphore)
+        except Exception as e:
+            print(f"Error fetching comments of {post['id']}: {e}")
+            return
+        trees[post["id"]] = (post, comments, more_ids)
+        store_tree(post, comments, more_ids)
+
+    await asyncio.gather(*(fetch_tree(post) for post in to_fetch))
+    for post_id, (_, comments, _) in trees.items():
+        scan.match(post_id, comments, matcher)
+
+    # Expand "more" stubs only where no match has surfaced the post yet
+    pending = [
+        post_id for post_id, (_, _, more_ids) in trees.items()
+        if more_ids and post_id not in matched_ids and post_id not in scan.matches
+    ]
+
+    async def expand(post_id):
+        post, comments, more_ids = trees[post_id]
+        batch = more_ids[:MORE_CHILDREN_BATCH]
+        try:
+            new_comments, new_more_ids = await fetch_more_comments(client, headers, post_id, batch, semaphore)
+        except Exception as e:
+            print(f"Error expanding comments of {post_id}: {e}")
+            trees[post_id] = (post, comments, [])
+            return
+        trees[post_id] = (post, comments + new_comments, more_ids[len(batch):] + new_more_ids)
+        store_tree(post, *trees[post_id][1:], expanded=True)
+        scan.match(post_id, new_comments, matcher)
+
+    while pending:
+        batch = []
+        for post_id in pending:
+            if not scan.take_request():
+                break
+            batch.append(post_id)
+        if not batch:
+            break
+        await asyncio.gather(*(expand(post_id) for post_id in batch))
+        pending = [post_id for post_id in pending if trees[post_id][2] and post_id not in scan.matches]
+    return scan
@@ -9,8 +9,43 @@ class Settings(BaseSettings):
     reddit_username: Optional[str] = None
     reddit_password: Optional[str] = None
     
+    # Search response cache
+    search_cache_ttl_seconds: float = 60.0  # Identical searches within this window reuse the last crawl
+    search_cache_stale_seconds: float = 240.0  # Past the TTL, serve the old result while re-crawling in the background
+    search_cache_max_entries: int = 256  # Least recently used searches are evicted beyond this
+    
+    # Local post corpus
+    corpus_enabled: bool = True  # Answer covered time windows from stored posts instead of Reddit
+    corpus_retention_days: int = 30  # Stored posts older than this are pruned
+    corpus_refresh_hours: float = 24.0  # Posts last fetched younger than this are fetched again so their scores, comment counts and text stay current
+    
+    # Monitors
+    monitor_scheduler_enabled: bool = True
+    monitor_poll_seconds: float = 30.0  # How often the scheduler checks for due monitors
+    
+    # Displayed posts retention
+    displayed_posts_retention_days: int = 90  # Posts created and displayed before this are pruned; 0 disables. Keep above the longest days_back searched
+    displayed_posts_archive: bool = False  # Move pruned rows to displayed_posts_archive instead of deleting them
+    displayed_posts_retention_interval_hours: float = 6.0  # How often the retention job runs
+    displayed_posts_prune_batch_size: int = 5000  # Rows pruned per committed batch
+    seen_posts_index_enabled: bool = True  # Answer dedup checks from memory; disable when several workers share the database
+    seen_posts_bloom_capacity: int = 100000  # Older ids per Bloom filter before a larger one is chained
+    seen_posts_bloom_error_rate: float = 0.01  # Share of never-displayed older ids still checked against the database
+    duplicate_max_distance: int = 3  # Most differing SimHash bits for two posts to count as near-duplicates; -1 only groups cross-posts
+    
     # OpenAI API
     openai_api_key: Optional[str] = None
+    openai_model: str = "gpt-3.5-turbo"
+    openai_max_concurrency: int = 8  # Chat completions in flight per analysis request
+    openai_max_retries: int = 5  # Retries for 429 and 5xx responses
+    openai_max_backoff: float = 60.0  # Upper bound in seconds for a single retry wait
+    analysis_batch_token_budget: int = 6000  # Estimated prompt + answer tokens per batched request
+    analysis_batch_max_posts: int = 20  # Posts per batched request
+    openai_max_completion_tokens: int = 4096  # Completion token limit of the model; batches are capped so their answers fit
+    analysis_cache_ttl_hours: float = 168.0  # How long a cached analysis stays valid
+    analysis_cache_max_entries: int = 50000  # Oldest entries are evicted beyond this
+    analysis_prerank_top_n: int = 0  # Send at most this many posts per request to the model, best local scores first; 0 sends all
+    analysis_prerank_min_score: float = 0.0  # Keep posts whose local similarity to the business context (0-1) is below this from the model
     
     # Google Docs API
     google_credentials_file: Optional[str] = None
@@ -19,12 +54,37 @@ class Settings(BaseSettings):
     google_access_token: Optional[str] = None
     google_refresh_token: Optional[str] = None
     
+    # Request profiling
+    profiling_enabled: bool = False  # Allow profiling requests that send the X-Profile header
+    profiling_token: Optional[str] = None  # Required for profiling: X-Profile must carry this value, also for /api/admin/profiles
+    profiling_dir: str = "./profiles"  # Where captured profiles are stored
+    profiling_max_profiles: int = 20  # Oldest profiles are deleted beyond this
+    profiling_interval: float = 0.001  # pyinstrument sampling interval in seconds
+    
     # App settings
     debug: bool = False
     user_agent: Optional[str] = None
     keywords: Optional[str] = None
     subreddits: Optional[str] = None
     
+    # Search tuning
+    reddit_max_concurrency: int = 8  # Parallel subreddit fetches per search
+    reddit_max_pages_per_subreddit: int = 10  # Listing pages (100 posts each) to follow before giving up on the cutoff
+    reddit_token_refresh_margin: float = 300.0  # Seconds before expiry to refresh the OAuth token
+    reddit_default_requests_per_minute: float = 100.0  # Pace until Reddit reports the remaining budget
+    reddit_rate_limit_burst: int = 20  # Requests let through back to back before pacing applies
+    reddit_max_retries: int = 4  # Retries for 429 and 5xx responses
+    reddit_max_backoff: float = 60.0  # Upper bound in seconds for a single retry wait
+    keyword_matcher_cache_size: int = 64  # Compiled keyword automata kept in the LRU
+    reddit_combined_listings: bool = True  # Fetch several subreddits per request through r/a+b+c listings
+    reddit_max_subreddits_per_listing: int = 25  # Upper bound on subreddits in one combined listing
+    reddit_combined_listing_fill: float = 0.5  # Share of the page budget a combined listing is planned to use
+    reddit_default_posts_per_day: float = 100.0  # Assumed post rate for subreddits not crawled yet
+    comment_scan_request_budget: int = 60  # Most comment requests one search with scan_comments may make
+    comment_scan_comments_per_post: int = 500  # Comments requested with each post's tree; the rest arrive as "more" stubs
+    comment_cache_max_comments: int = 100000  # Comments kept in memory across stored trees, reused while a post's comment count is unchanged
+    comment_cache_unverified_seconds: float = 3600.0  # Trees of corpus-served posts, whose stored count predates the tree, are re-fetched after this
+    
     class Config:
         env_file = ".env"
         extra = "ignore"  # Ignore extra environment variables
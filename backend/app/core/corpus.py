@@ -0,0 +1,171 @@
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, or_, text
+from sqlalchemy.orm import Session
+
+from app import database
+from app.core.config import settings
+from app.core.matcher import KeywordMatcher, normalize_text
+from app.core.metrics import POSTS_MATCHED, POSTS_SCANNED
+from app.database import chunked, upsert, CorpusCoverage, CorpusPost
+
+# Trigram index queries need patterns of at least three characters
+MIN_FTS_PATTERN_LENGTH = 3
+
+# Columns a re-fetch overwrites, since Reddit keeps changing them after a post is first stored
+REFRESHED_COLUMNS = ["title", "selftext", "score", "num_comments", "search_text", "fetched_at", "fetched_age"]
+
+_last_pruned_at = 0.0
+
+def get_retention_cutoff() -> float:
+    """Posts created before this epoch timestamp are dropped from the corpus."""
+    return time.time() - settings.corpus_retention_days * 86400
+
+def get_coverages(db: Session, subreddits: List[str]) -> Dict[str, tuple[float, float]]:
+    """Return the (from, to) epoch window the corpus fully covers for each given subreddit."""
+    by_key = {subreddit.lower(): subreddit for subreddit in subreddits}
+    retention_cutoff = get_retention_cutoff()
+    rows = db.query(CorpusCoverage).filter(CorpusCoverage.subreddit.in_(list(by_key)))
+    return {
+        by_key[coverage.subreddit]: (max(coverage.covered_from, retention_cutoff), coverage.covered_to)
+        for coverage in rows
+    }
+
+def get_unsettled_from(db: Session, subreddits: List[str], created_from: float) -> Dict[str, float]:
+    """Return, by subreddit, the creation time of the oldest stored post since created_from that was fetched while still young.
+    
+    Such posts were stored before their score and comment count settled, so the
+    window from there on is fetched again rather than served from the corpus.
+    """
+    by_key = {subreddit.lower(): subreddit for subreddit in subreddits}
+    rows = db.query(CorpusPost.subreddit, func.min(CorpusPost.created_utc)).filter(
+        CorpusPost.subreddit.in_(list(by_key)),
+        CorpusPost.created_utc >= created_from,
+        or_(CorpusPost.fetched_age.is_(None), CorpusPost.fetched_age < settings.corpus_refresh_hours * 3600),
+    ).group_by(CorpusPost.subreddit)
+    return {by_key[subreddit]: created_utc for subreddit, created_utc in rows}
+
+def store_posts(db: Session, subreddit: str, posts: List[dict], covered_from: float, covered_to: float):
+    """Add fetched listing posts to the corpus, refreshing stored copies, and record the window they fully cover.
+    
+    The listing returns every post between the oldest fetched one and covered_to,
+    so stored posts in that span that it no longer returns were removed and are
+    dropped.
+    """
+    global _last_pruned_at
+    now = time.time()
+    rows = {}
+    for post in posts:
+        reddit_id = post.get("id")
+        if not reddit_id or reddit_id in rows:
+            continue
+        rows[reddit_id] = {
+            "reddit_id": reddit_id,
+            "fullname": post.get("name"),
+            "subreddit": subreddit.lower(),
+            "subreddit_name": post.get("subreddit", subreddit),
+            "title": post.get("title", ""),
+            "selftext": post.get("selftext", ""),
+            "permalink": post.get("permalink", ""),
+            "score": post.get("score", 0),
+            "num_comments": post.get("num_comments", 0),
+            "created_utc": float(post.get("created_utc", 0)),
+            "search_text": normalize_text(f"{post.get('title', '')}\n{post.get('selftext', '')}"),
+            "fetched_at": datetime.utcnow(),
+            "fetched_age": now - float(post.get("created_utc", 0)),
+        }
+    for chunk in chunked(list(rows.values())):
+        db.execute(upsert(db, CorpusPost, ["reddit_id"], REFRESHED_COLUMNS), chunk)
+    
+    if rows:
+        removed = [
+            row_id for row_id, reddit_id in db.query(CorpusPost.id, CorpusPost.reddit_id).filter(
+                CorpusPost.subreddit == subreddit.lower(),
+                CorpusPost.created_utc >= min(row["created_utc"] for row in rows.values()),
+                CorpusPost.created_utc <= covered_to,
+            )
+            if reddit_id not in rows
+        ]
+        for chunk in chunked(removed):
+            db.query(CorpusPost).filter(CorpusPost.id.in_(chunk)).delete(synchronize_session=False)
+    
+    coverage = db.query(CorpusCoverage).filter(CorpusCoverage.subreddit == subreddit.lower()).first()
+    if coverage is None:
+        db.add(CorpusCoverage(subreddit=subreddit.lower(), covered_from=covered_from, covered_to=covered_to))
+    else:
+        coverage.covered_from = covered_from
+        coverage.covered_to = covered_to
+        coverage.updated_at = datetime.utcnow()
+    
+    # Enforce retention at most once a minute rather than on every write
+    if time.time() - _last_pruned_at > 60:
+        _last_pruned_at = time.time()
+        db.query(CorpusPost).filter(CorpusPost.created_utc < get_retention_cutoff()).delete(synchronize_session=False)
+    db.commit()
+
+def to_listing_post(post: CorpusPost) -> dict:
+    """Shape a stored post like a listing item's data."""
+    return {
+        "id": post.reddit_id,
+        "name": post.fullname,
+        "title": post.title,
+        "selftext": post.selftext or "",
+        "subreddit": post.subreddit_name,
+        "permalink": post.permalink,
+        "score": post.score,
+        "num_comments": post.num_comments,
+        "created_utc": post.created_utc,
+        "counted_at": post.fetched_at.replace(tzinfo=timezone.utc).timestamp(),  # When score and num_comments were observed
+    }
+
+def build_fts_query(patterns: List[str]) -> Optional[str]:
+    """OR the keyword patterns into an FTS5 query, or None if the index cannot narrow the search."""
+    if not patterns or any(len(pattern) < MIN_FTS_PATTERN_LENGTH for pattern in patterns):
+        return None
+    return " OR ".join('"' + pattern.replace('"', '""') + '"' for pattern in patterns)
+
+def search_corpus(
+    db: Session,
+    subreddit: str,
+    matcher: KeywordMatcher,
+    created_from: float,
+    created_to: float,
+) -> List[tuple[dict, List[str]]]:
+    """Match keywords against stored posts of a subreddit created within [created_from, created_to].
+    
+    The FTS index narrows the candidates; the matcher then applies the exact keyword
+    semantics. Results are newest first, shaped like listing items.
+    """
+    query = db.query(CorpusPost).filter(
+        CorpusPost.subreddit == subreddit.lower(),
+        CorpusPost.created_utc >= created_from,
+        CorpusPost.created_utc <= created_to,
+    )
+    fts_query = build_fts_query(matcher.patterns) if database.corpus_fts_available else None
+    if fts_query is not None:
+        query = query.filter(CorpusPost.id.in_(
+            text("SELECT rowid FROM corpus_fts WHERE corpus_fts MATCH :fts_query").bindparams(fts_query=fts_query)
+        ))
+    
+    found = []
+    scanned = 0
+    for post in query.order_by(CorpusPost.created_utc.desc()):
+        scanned += 1
+        is_match, matched_keywords = matcher.match(f"{post.title}\n{post.selftext or ''}")
+        if is_match:
+            found.append((to_listing_post(post), matched_keywords))
+    POSTS_SCANNED.labels("corpus").inc(scanned)
+    POSTS_MATCHED.labels("corpus").inc(len(found))
+    return found
+
+def get_commented_posts(db: Session, subreddit: str, created_from: float, created_to: float, limit: int) -> List[dict]:
+    """Return up to limit stored posts of a subreddit created within [created_from, created_to] that have comments, most commented first."""
+    query = db.query(CorpusPost).filter(
+        CorpusPost.subreddit == subreddit.lower(),
+        CorpusPost.created_utc >= created_from,
+        CorpusPost.created_utc <= created_to,
+        CorpusPost.num_comments > 0,
+    )
+    return [to_listing_post(post) for post in query.order_by(CorpusPost.num_comments.desc()).limit(limit)]
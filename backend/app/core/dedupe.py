@@ -0,0 +1,142 @@
+from typing import Dict, Hashable, List, Optional, Sequence, Set
+
+import numpy as np
+
+from app.core.prerank import hash_features
+
+FINGERPRINT_MASK = (1 << 64) - 1
+MIN_FINGERPRINT_WORDS = 4
+
+def simhash_texts(texts: List[str]) -> np.ndarray:
+    """64-bit SimHash of each text over its distinct word hashes, as signed int64.
+
+    Each bit is set when most of the text's distinct words have it set, so texts
+    sharing most of their words differ in few bits; case, punctuation, word order
+    and repetition do not matter. Texts with fewer than MIN_FINGERPRINT_WORDS
+    distinct words are too short to tell reposts from coincidence and get 0, which
+    is never treated as a duplicate.
+    """
+    fingerprints = np.zeros(len(texts), dtype=np.int64)
+    if not texts:
+        return fingerprints
+    words, docs = hash_features(texts, bigrams=False)
+
+    # Distinct words per text, ordered by text; the low 40 hash bits tell words apart
+    _, first = np.unique((docs.astype(np.uint64) << np.uint64(40)) | (words & np.uint64((1 << 40) - 1)), return_index=True)
+    words, docs = words[first], docs[first]
+    counts = np.bincount(docs, minlength=len(texts))
+    long_enough = counts >= MIN_FINGERPRINT_WORDS
+    if not long_enough.any():
+        return fingerprints
+    keep = long_enough[docs]
+    words, counts = words[keep], counts[long_enough]
+    offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+    # One row per bit, one column per word, with each text's words side by side
+    bits = np.unpackbits(words.view(np.uint8).reshape(-1, 8), axis=1).T.copy()
+    bit_counts = np.add.reduceat(bits, offsets, axis=1, dtype=np.int32)
+    majority = np.packbits(bit_counts * 2 > counts, axis=0)
+    fingerprints[long_enough] = np.ascontiguousarray(majority.T).view(np.int64).ravel()
+    return fingerprints
+
+def hamming_distance(a: int, b: int) -> int:
+    return ((a ^ b) & FINGERPRINT_MASK).bit_count()
+
+class FingerprintBuckets:
+    """Finds stored fingerprints within max_distance bits of a query without comparing against all of them.
+
+    Fingerprints are split into max_distance + 1 bands. Two fingerprints at most
+    max_distance bits apart agree exactly on at least one band, so only entries
+    sharing a band with the query are compared.
+    """
+
+    def __init__(self, max_distance: int):
+        self.max_distance = max(0, max_distance)
+        band_count = self.max_distance + 1
+        band_bits = 64 // band_count
+        self._bands = [
+            (band * band_bits, 64 - band * band_bits if band == band_count - 1 else band_bits)
+            for band in range(band_count)
+        ]
+        self._buckets: Dict[tuple[int, int], Set[Hashable]] = {}
+        self._fingerprints: Dict[Hashable, int] = {}
+
+    def _band_keys(self, fingerprint: int):
+        fingerprint &= FINGERPRINT_MASK
+        for band, (shift, width) in enumerate(self._bands):
+            yield band, (fingerprint >> shift) & ((1 << width) - 1)
+
+    def add(self, key: Hashable, fingerprint: int):
+        if not fingerprint or key in self._fingerprints:
+            return
+        self._fingerprints[key] = fingerprint
+        for band_key in self._band_keys(fingerprint):
+            self._buckets.setdefault(band_key, set()).add(key)
+
+    def remove(self, key: Hashable):
+        fingerprint = self._fingerprints.pop(key, None)
+        if fingerprint is None:
+            return
+        for band_key in self._band_keys(fingerprint):
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band_key]
+
+    def matches(self, fingerprint: int) -> List[Hashable]:
+        """Keys of stored fingerprints within max_distance bits, closest first."""
+        if not fingerprint:
+            return []
+        candidates = set()
+        for band_key in self._band_keys(fingerprint):
+            candidates.update(self._buckets.get(band_key, ()))
+        distances = [(hamming_distance(fingerprint, self._fingerprints[key]), key) for key in candidates]
+        return [key for distance, key in sorted(distances, key=lambda item: item[0]) if distance <= self.max_distance]
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+def group_near_duplicates(
+    fingerprints: Sequence[int],
+    max_distance: int,
+    keys: Optional[Sequence[Optional[Hashable]]] = None,
+) -> List[List[int]]:
+    """Group indexes whose fingerprints are within max_distance bits, or that share a non-empty key.
+
+    Only fingerprints that matched nothing earlier are kept for comparison, so each
+    group grows around its first members instead of chaining through every near
+    match, and large clusters of similar posts stay cheap to compare against.
+    Groups are listed in order of their first index, each in index order. A
+    negative max_distance only groups by key.
+    """
+    parents = list(range(len(fingerprints)))
+
+    def find(index: int) -> int:
+        while parents[index] != index:
+            parents[index] = parents[parents[index]]
+            index = parents[index]
+        return index
+
+    def union(a: int, b: int):
+        a, b = find(a), find(b)
+        if a != b:
+            parents[max(a, b)] = min(a, b)
+
+    buckets = FingerprintBuckets(max_distance) if max_distance >= 0 else None
+    first_by_key: Dict[Hashable, int] = {}
+    for index, fingerprint in enumerate(fingerprints):
+        key = keys[index] if keys is not None else None
+        if key:
+            union(first_by_key.setdefault(key, index), index)
+        if buckets is not None:
+            matches = buckets.matches(fingerprint)
+            for match in matches:
+                union(match, index)
+            if not matches:
+                buckets.add(index, fingerprint)
+
+    groups: Dict[int, List[int]] = {}
+    for index in range(len(fingerprints)):
+        groups.setdefault(find(index), []).append(index)
+    return list(groups.values())
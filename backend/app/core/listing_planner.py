@@ -0,0 +1,59 @@
+from typing import Dict, List
+
+from app.core.config import settings
+
+# Reddit returns at most this many posts per listing page
+LISTING_PAGE_SIZE = 100
+
+# Posts per second observed for each subreddit (lowercased), smoothed across crawls
+_post_rates: Dict[str, float] = {}
+
+def get_post_rate(subreddit: str) -> float:
+    """Return the expected posts per second for a subreddit, falling back to the configured default."""
+    return _post_rates.get(subreddit.lower(), settings.reddit_default_posts_per_day / 86400)
+
+def record_post_rate(subreddit: str, post_count: int, window_seconds: float):
+    """Fold the posts seen over a crawled time window into the subreddit's rate estimate."""
+    if window_seconds <= 0:
+        return
+    # One extra post keeps quiet subreddits from settling at a rate of exactly zero
+    rate = (post_count + 1) / window_seconds
+    previous = _post_rates.get(subreddit.lower())
+    if previous is None or previous == float("inf"):
+        _post_rates[subreddit.lower()] = rate
+    else:
+        _post_rates[subreddit.lower()] = (previous + rate) / 2
+
+def record_listing_error(subreddit: str):
+    """Keep a subreddit that fails on its own out of combined listings, where it would fail the whole group."""
+    _post_rates[subreddit.lower()] = float("inf")
+
+def plan_listing_groups(windows: Dict[str, float]) -> List[List[str]]:
+    """Group subreddits into combined r/a+b+c listings, given the seconds of history each one needs.
+
+    A combined listing is fetched down to its oldest member's cutoff, so a group's
+    expected size is the sum of its members' post rates times its longest window.
+    Groups are packed first-fit, busiest subreddits first, so that expected size stays
+    within a share of the page budget and quiet subreddits reach their cutoff before
+    busy ones use up the pages. Subreddits that alone exceed it are fetched on their own.
+    """
+    if not settings.reddit_combined_listings:
+        return [[subreddit] for subreddit in windows]
+
+    capacity = max(1, settings.reddit_max_pages_per_subreddit) * LISTING_PAGE_SIZE * settings.reddit_combined_listing_fill
+    max_members = max(1, settings.reddit_max_subreddits_per_listing)
+
+    # Each group is [total rate, longest window, members]
+    groups: List[list] = []
+    for subreddit in sorted(windows, key=lambda name: get_post_rate(name) * windows[name], reverse=True):
+        rate = get_post_rate(subreddit)
+        window = max(0.0, windows[subreddit])
+        for group in groups:
+            if len(group[2]) < max_members and (group[0] + rate) * max(group[1], window) <= capacity:
+                group[0] += rate
+                group[1] = max(group[1], window)
+                group[2].append(subreddit)
+                break
+        else:
+            groups.append([rate, window, [subreddit]])
+    return [members for _, _, members in groups]
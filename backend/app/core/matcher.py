@@ -0,0 +1,98 @@
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Tuple
+
+import ahocorasick
+
+from app.core.config import settings
+
+# (normalized pattern, whole-word flag)
+KeywordSpec = Tuple[str, bool]
+
+def normalize_text(text: str) -> str:
+    """Lowercase text and collapse whitespace runs so phrases match across line breaks."""
+    return " ".join((text or "").lower().split())
+
+def normalize_keyword(keyword: str, whole_word: bool = False) -> KeywordSpec:
+    """Turn a user keyword into a matcher spec.
+    
+    A keyword wrapped in double quotes is a phrase: it always matches on word
+    boundaries. Other keywords match on word boundaries only when whole_word is set.
+    """
+    keyword = keyword.strip()
+    if len(keyword) >= 2 and keyword[0] == keyword[-1] == '"':
+        return normalize_text(keyword[1:-1]), True
+    return normalize_text(keyword), whole_word
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton finding every keyword spec in one pass over the text."""
+
+    def __init__(self, specs: FrozenSet[KeywordSpec]):
+        self.specs = sorted(specs)
+        self._automaton = ahocorasick.Automaton()
+        patterns: Dict[str, List[int]] = {}
+        for spec_id, (pattern, _) in enumerate(self.specs):
+            patterns.setdefault(pattern, []).append(spec_id)
+        for pattern, spec_ids in patterns.items():
+            self._automaton.add_word(pattern, (len(pattern), spec_ids))
+        if patterns:
+            self._automaton.make_automaton()
+
+    def search(self, text: str) -> set:
+        """Return the ids of all specs found in already-normalized text."""
+        found = set()
+        if not self.specs:
+            return found
+        
+        specs = self.specs
+        remaining = len(specs)
+        last = len(text) - 1
+        for end, (length, spec_ids) in self._automaton.iter(text):
+            for spec_id in spec_ids:
+                if spec_id in found:
+                    continue
+                if specs[spec_id][1]:
+                    start = end - length + 1
+                    if start > 0 and _is_word_char(text[start - 1]):
+                        continue
+                    if end < last and _is_word_char(text[end + 1]):
+                        continue
+                found.add(spec_id)
+                remaining -= 1
+            if not remaining:
+                break
+        return found
+
+@lru_cache(maxsize=settings.keyword_matcher_cache_size)
+def get_automaton(specs: FrozenSet[KeywordSpec]) -> KeywordAutomaton:
+    """Return a compiled automaton for a normalized keyword set, reusing recent ones."""
+    return KeywordAutomaton(specs)
+
+class KeywordMatcher:
+    """Matches text against a request's keywords and reports the keywords as the user typed them."""
+
+    def __init__(self, keywords: List[str], whole_word: bool = False):
+        self.keywords = keywords
+        spec_keywords: Dict[KeywordSpec, List[int]] = {}
+        for index, keyword in enumerate(keywords):
+            spec = normalize_keyword(keyword, whole_word)
+            if spec[0]:
+                spec_keywords.setdefault(spec, []).append(index)
+        
+        self._automaton = get_automaton(frozenset(spec_keywords))
+        self._keyword_indexes = [spec_keywords[spec] for spec in self._automaton.specs]
+
+    @property
+    def patterns(self) -> List[str]:
+        """Normalized patterns being searched for, e.g. to build an index query."""
+        return sorted({pattern for pattern, _ in self._automaton.specs})
+
+    def match(self, text: str) -> tuple[bool, List[str]]:
+        """Check if text matches any keywords, returning matches in request order."""
+        found = self._automaton.search(normalize_text(text))
+        if not found:
+            return False, []
+        indexes = sorted(i for spec_id in found for i in self._keyword_indexes[spec_id])
+        return True, [self.keywords[i] for i in indexes]
@@ -0,0 +1,71 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+
+METRICS_MEDIA_TYPE = CONTENT_TYPE_LATEST
+
+STAGE_SECONDS = Histogram(
+    "reddit_agent_stage_seconds",
+    "Time spent in each stage of search and analysis requests",
+    ["stage"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+DB_SECONDS = Histogram(
+    "reddit_agent_db_seconds",
+    "Time spent in each database helper, including the threadpool hop",
+    ["helper"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+POSTS_SCANNED = Counter("reddit_agent_posts_scanned_total", "Posts checked against keywords", ["source"])
+POSTS_MATCHED = Counter("reddit_agent_posts_matched_total", "Posts that matched at least one keyword", ["source"])
+CACHE_LOOKUPS = Counter("reddit_agent_cache_lookups_total", "Cache lookups by cache and outcome", ["cache", "result"])
+UPSTREAM_ERRORS = Counter(
+    "reddit_agent_upstream_errors_total",
+    "429 and 5xx responses from Reddit and OpenAI",
+    ["service", "status"],
+)
+
+# Stage timings of the request being handled, when it asked for a breakdown
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+def start_request_timings() -> Dict[str, float]:
+    """Collect stage timings for the current request; tasks it starts add to the same dict."""
+    timings: Dict[str, float] = {}
+    _request_timings.set(timings)
+    return timings
+
+def record_stage(stage: str, seconds: float):
+    """Observe a stage duration and add it to the current request's breakdown, if any."""
+    STAGE_SECONDS.labels(stage).observe(seconds)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+def add_request_timings(timings: Dict[str, float]):
+    """Add stages already observed elsewhere, such as a shared crawl, to the current request's breakdown, if any."""
+    current = _request_timings.get()
+    if current is not None:
+        for stage, seconds in timings.items():
+            current[stage] = current.get(stage, 0.0) + seconds
+
+@contextmanager
+def timed_stage(stage: str):
+    """Time the enclosed block as a request stage."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started)
+
+def round_timings(timings: Optional[Dict[str, float]]) -> Optional[Dict[str, float]]:
+    """Round a collected breakdown to milliseconds for responses."""
+    if timings is None:
+        return None
+    return {stage: round(seconds, 3) for stage, seconds in sorted(timings.items())}
+
+def render_metrics() -> bytes:
+    """Render every metric in the Prometheus text format."""
+    return generate_latest()
@@ -0,0 +1,86 @@
+from typing import List, Set
+
+import numpy as np
+
+# Bytes that belong to words: ASCII letters and digits, plus every non-ASCII byte so
+# UTF-8 encoded letters stay inside their word
+WORD_BYTES = np.zeros(256, dtype=bool)
+WORD_BYTES[[*range(ord("0"), ord("9") + 1), *range(ord("a"), ord("z") + 1), *range(128, 256)]] = True
+
+HASHED_PREFIX_BYTES = 16  # Words longer than this are hashed by their length and first bytes
+FEATURE_BITS = 18  # Words and bigrams are hashed into 2**18 feature buckets
+FNV_PRIME = np.uint64(1099511628211)
+
+def hash_words(data: np.ndarray, starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """FNV-style hashes of the words at starts, one vectorized step per byte position."""
+    hashes = lengths.astype(np.uint64)
+    last = len(data) - 1
+    for offset in range(min(HASHED_PREFIX_BYTES, int(lengths.max(initial=0)))):
+        inside = offset < lengths
+        byte = data[np.minimum(starts + offset, last)].astype(np.uint64)
+        hashes = np.where(inside, (hashes * FNV_PRIME) ^ byte, hashes)
+    return hashes
+
+def hash_features(texts: List[str], bigrams: bool = True) -> tuple[np.ndarray, np.ndarray]:
+    """Hash the words of each text, followed by its word bigrams unless bigrams is False.
+
+    Returns 64-bit feature hashes and the index of the text each feature came from.
+    Tokenizing and hashing run as NumPy operations over the concatenated UTF-8
+    bytes, with no per-word Python work.
+    """
+    encoded = [(text or "").lower().encode() for text in texts]
+    doc_starts = np.cumsum([0] + [len(chunk) + 1 for chunk in encoded[:-1]])
+    data = np.frombuffer(b" ".join(encoded) + b" ", dtype=np.uint8)
+
+    # Word boundaries are where the word-byte mask flips
+    edges = np.diff(WORD_BYTES[data].astype(np.int8), prepend=np.int8(0))
+    starts = np.flatnonzero(edges == 1)
+    lengths = np.flatnonzero(edges == -1) - starts
+    words = hash_words(data, starts, lengths)
+    docs = np.searchsorted(doc_starts, starts, side="right") - 1
+
+    if not bigrams:
+        return words, docs
+
+    # Bigrams of neighbouring words in the same text
+    same_doc = docs[1:] == docs[:-1]
+    pairs = (words[:-1][same_doc] * FNV_PRIME) ^ (words[1:][same_doc] + np.uint64(1))
+    return np.concatenate([words, pairs]), np.concatenate([docs, docs[:-1][same_doc]])
+
+def score_texts(query: str, texts: List[str]) -> np.ndarray:
+    """Cosine similarity of each text to the query over TF-IDF weighted words and word bigrams.
+
+    Counting and weighting run in NumPy over all texts at once, so scoring thousands
+    of posts takes milliseconds. Features are hashed into fixed buckets; the rare
+    collision only nudges a score. IDF is taken over the query and texts together,
+    so words common to most posts in the batch count for little. Returns one score
+    in [0, 1] per text.
+    """
+    if not texts:
+        return np.zeros(0)
+    doc_count = len(texts) + 1
+    features, feature_docs = hash_features([query, *texts])
+    features = features & np.uint64((1 << FEATURE_BITS) - 1)
+    feature_docs = feature_docs.astype(np.uint64)
+
+    # Count each (text, feature) pair once, then weight it by sublinear TF times IDF
+    pairs, term_counts = np.unique((feature_docs << np.uint64(FEATURE_BITS)) | features, return_counts=True)
+    pair_docs = (pairs >> np.uint64(FEATURE_BITS)).astype(np.int64)
+    pair_features = (pairs & np.uint64((1 << FEATURE_BITS) - 1)).astype(np.int64)
+    doc_frequency = np.bincount(pair_features, minlength=1 << FEATURE_BITS)
+    idf = np.log((doc_count + 1) / (doc_frequency + 1)) + 1
+    weights = (1 + np.log(term_counts)) * idf[pair_features]
+
+    query_weights = np.zeros(1 << FEATURE_BITS)
+    in_query = pair_docs == 0
+    query_weights[pair_features[in_query]] = weights[in_query]
+
+    norms = np.sqrt(np.bincount(pair_docs, weights=weights * weights, minlength=doc_count))
+    dots = np.bincount(pair_docs, weights=weights * query_weights[pair_features], minlength=doc_count)
+    return np.clip(dots[1:] / np.maximum(norms[1:] * norms[0], 1e-12), 0.0, 1.0)
+
+def select_top(scores: np.ndarray, top_n: int, min_score: float) -> Set[int]:
+    """Indexes scoring at least min_score, limited to the top_n best when top_n is positive."""
+    order = np.argsort(-scores, kind="stable")
+    selected = order[scores[order] >= min_score]
+    return set((selected[:top_n] if top_n > 0 else selected).tolist())
@@ -0,0 +1,134 @@
+import hmac
+import json
+import os
+import re
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from fastapi import Request, Response
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+PROFILE_ID_PATTERN = re.compile(r"^[0-9]{8}T[0-9]{6}-[0-9a-f]{8}$")
+
+def is_profile_authorized(header_value: Optional[str]) -> bool:
+    """Check the X-Profile header against the configured token; without a token nothing is authorized."""
+    if header_value is None or not settings.profiling_token:
+        return False
+    return hmac.compare_digest(header_value.encode(), settings.profiling_token.encode())
+
+class RequestProfiler:
+    """Profiles one request, with pyinstrument when installed and cProfile otherwise.
+
+    pyinstrument samples the whole call stack and, in async mode, charges time spent
+    awaiting to the awaiting coroutine, so slow Reddit or OpenAI round trips show up
+    where they were awaited. cProfile only sees CPU time between awaits.
+    """
+
+    def __init__(self):
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            import cProfile
+            self.format = "prof"
+            self._profiler = cProfile.Profile()
+        else:
+            self.format = "html"
+            self._profiler = Profiler(interval=settings.profiling_interval, async_mode="enabled")
+
+    def start(self):
+        if self.format == "html":
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def stop(self):
+        if self.format == "html":
+            self._profiler.stop()
+        else:
+            self._profiler.disable()
+
+    def write(self, path: str):
+        if self.format == "html":
+            with open(path, "w") as f:
+                f.write(self._profiler.output_html())
+        else:
+            self._profiler.dump_stats(path)
+
+def save_profile(profiler: RequestProfiler, profile_id: str, metadata: dict):
+    """Write a profile and its metadata to the profile directory and prune the oldest beyond the limit."""
+    os.makedirs(settings.profiling_dir, exist_ok=True)
+    profiler.write(os.path.join(settings.profiling_dir, f"{profile_id}.{profiler.format}"))
+    with open(os.path.join(settings.profiling_dir, f"{profile_id}.json"), "w") as f:
+        json.dump(metadata, f)
+
+    for old in list_profiles()[max(0, settings.profiling_max_profiles):]:
+        for name in (f"{old['id']}.json", f"{old['id']}.{old['format']}"):
+            try:
+                os.remove(os.path.join(settings.profiling_dir, name))
+            except FileNotFoundError:
+                pass
+
+def list_profiles() -> List[dict]:
+    """Return stored profile metadata, newest first."""
+    if not os.path.isdir(settings.profiling_dir):
+        return []
+    profiles = []
+    for name in os.listdir(settings.profiling_dir):
+        if not name.endswith(".json") or not PROFILE_ID_PATTERN.match(name[:-5]):
+            continue
+        try:
+            with open(os.path.join(settings.profiling_dir, name)) as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return sorted(profiles, key=lambda profile: profile.get("started_at", ""), reverse=True)
+
+def get_profile_path(profile_id: str) -> Optional[tuple[str, str]]:
+    """Return the file path and format of a stored profile, or None if there is no such profile."""
+    if not PROFILE_ID_PATTERN.match(profile_id):
+        return None
+    for profile_format in ("html", "prof"):
+        path = os.path.join(settings.profiling_dir, f"{profile_id}.{profile_format}")
+        if os.path.isfile(path):
+            return path, profile_format
+    return None
+
+async def profile_request(request: Request, response: Response):
+    """Dependency that profiles the endpoint when profiling is enabled and the request sends the X-Profile token.
+
+    The profile id is returned in the X-Profile-Id response header; the profile can
+    then be downloaded from /api/admin/profiles/{id}. Without the flag, a configured
+    PROFILING_TOKEN and a matching header this does nothing.
+    """
+    if not settings.profiling_enabled or not is_profile_authorized(request.headers.get(PROFILE_HEADER)):
+        yield
+        return
+
+    started_at = datetime.now(timezone.utc)
+    profile_id = f"{started_at:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+    response.headers[PROFILE_ID_HEADER] = profile_id
+    profiler = RequestProfiler()
+    started = time.perf_counter()
+    profiler.start()
+    try:
+        yield
+    finally:
+        profiler.stop()
+        metadata = {
+            "id": profile_id,
+            "method": request.method,
+            "path": request.url.path,
+            "started_at": started_at.isoformat(),
+            "duration": time.perf_counter() - started,
+            "format": profiler.format,
+        }
+        try:
+            await run_in_threadpool(save_profile, profiler, profile_id, metadata)
+        except Exception as e:
+            print(f"Failed to save profile {profile_id}: {e}")
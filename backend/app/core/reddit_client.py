@@ -0,0 +1,219 @@
+import asyncio
+import base64
+import random
+import time
+from typing import Optional
+
+import httpx
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.metrics import UPSTREAM_ERRORS
+
+REDDIT_TOKEN_URL = "https://www.reddit.com/api/v1/access_token"
+REDDIT_API_BASE = "https://oauth.reddit.com"
+DEFAULT_USER_AGENT = "RedditAgent/1.0 by /u/yourusername"
+
+class RedditRateLimiter:
+    """Token bucket shared by all Reddit traffic, paced by Reddit's X-Ratelimit headers.
+
+    Until Reddit has reported a budget, requests are paced at the configured default
+    rate. Each response's X-Ratelimit-Remaining and X-Ratelimit-Reset then set the
+    refill rate so the remaining budget is spread over the rest of the window, with
+    up to burst requests let through at once. Requests still in flight are deducted
+    from the reported budget, and an exhausted budget or a 429 pauses every caller
+    until Reddit's window resets.
+    """
+
+    def __init__(self, burst: Optional[int] = None, default_rate: Optional[float] = None):
+        self.burst = max(1, settings.reddit_rate_limit_burst if burst is None else burst)
+        self.default_rate = settings.reddit_default_requests_per_minute / 60 if default_rate is None else default_rate
+        self._rate = self.default_rate
+        self._tokens = float(self.burst)
+        self._refilled_at = time.monotonic()
+        self._remaining: Optional[float] = None
+        self._reset_at = 0.0
+        self._paused_until = 0.0
+        self._in_flight = 0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a request may be sent; callers are let through in arrival order."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                if self._remaining is not None and now >= self._reset_at:
+                    # A new window started; pace at the default until Reddit reports the new budget
+                    self._remaining = None
+                    self._rate = self.default_rate
+                if self._remaining is not None and self._remaining < 1:
+                    self._paused_until = self._reset_at
+                    continue
+                
+                self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self._rate)
+                self._refilled_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    if self._remaining is not None:
+                        self._remaining -= 1
+                    self._in_flight += 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / max(self._rate, 1e-3))
+
+    def release(self, headers: Optional[httpx.Headers] = None):
+        """Mark a request as answered and adopt the budget its response reported."""
+        self._in_flight = max(0, self._in_flight - 1)
+        if headers is None:
+            return
+        try:
+            remaining = float(headers["x-ratelimit-remaining"])
+            reset = float(headers["x-ratelimit-reset"])
+        except (KeyError, ValueError):
+            return
+        
+        now = time.monotonic()
+        self._remaining = max(0.0, remaining - self._in_flight)
+        self._reset_at = now + reset
+        self._rate = self._remaining / max(reset, 1.0)
+
+    def pause(self, seconds: float):
+        """Hold back every caller for the given number of seconds."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+def get_retry_delay(headers: httpx.Headers, attempt: int) -> float:
+    """Work out how long to wait before retrying, preferring Reddit's own hints."""
+    hinted = None
+    try:
+        if "retry-after" in headers:
+            hinted = float(headers["retry-after"])
+        elif float(headers.get("x-ratelimit-remaining", "1")) < 1:
+            hinted = float(headers.get("x-ratelimit-reset", ""))
+    except ValueError:
+        pass
+    
+    backoff = min(settings.reddit_max_backoff, 2 ** attempt) * random.uniform(0.5, 1.0)
+    if hinted is None:
+        return backoff
+    return min(settings.reddit_max_backoff, hinted + random.uniform(0, 0.25))
+
+class RedditClient(httpx.AsyncClient):
+    """httpx client that sends every request through a shared RedditRateLimiter.
+
+    429 and 5xx responses are retried with jittered backoff; a 429 also pauses all
+    other callers. The last response is returned once retries run out.
+    """
+
+    def __init__(self, *args, rate_limiter: Optional[RedditRateLimiter] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rate_limiter = rate_limiter or RedditRateLimiter()
+
+    async def send(self, request: httpx.Request, **kwargs) -> httpx.Response:
+        for attempt in range(settings.reddit_max_retries + 1):
+            await self.rate_limiter.acquire()
+            try:
+                response = await super().send(request, **kwargs)
+            except BaseException:
+                self.rate_limiter.release()
+                raise
+            self.rate_limiter.release(response.headers)
+            
+            if response.status_code != 429 and response.status_code < 500:
+                return response
+            if attempt >= settings.reddit_max_retries:
+                UPSTREAM_ERRORS.labels("reddit", str(response.status_code)).inc()
+                return response
+            
+            UPSTREAM_ERRORS.labels("reddit", str(response.status_code)).inc()
+            delay = get_retry_delay(response.headers, attempt)
+            print(f"Reddit returned {response.status_code} for {request.url.path}, retrying in {delay:.1f}s")
+            await response.aclose()
+            if response.status_code == 429:
+                self.rate_limiter.pause(delay)
+            else:
+                await asyncio.sleep(delay)
+        return response
+
+def create_reddit_client() -> RedditClient:
+    """Create the long-lived, rate-limited client shared by all Reddit traffic."""
+    max_connections = max(1, settings.reddit_max_concurrency) * 2
+    return RedditClient(
+        timeout=30.0,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=60.0,
+        ),
+        headers={"User-Agent": settings.reddit_user_agent or DEFAULT_USER_AGENT},
+    )
+
+class RedditTokenManager:
+    """Caches the application-only OAuth token and refreshes it before it expires.
+
+    Callers get the cached token while it is fresh. Inside the refresh margin the
+    still-valid token is returned and a single background refresh is started; once
+    the token has expired callers wait on the refresh. A lock ensures only one
+    request to the token endpoint is in flight at a time.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, refresh_margin: Optional[float] = None):
+        self.client = client
+        self.refresh_margin = settings.reddit_token_refresh_margin if refresh_margin is None else refresh_margin
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def _is_fresh(self) -> bool:
+        return self._token is not None and time.monotonic() < self._expires_at - self.refresh_margin
+
+    async def get_token(self) -> str:
+        """Return a valid bearer token, fetching a new one only when needed."""
+        if self._is_fresh():
+            return self._token
+        if self._token is not None and time.monotonic() < self._expires_at:
+            if self._refresh_task is None or self._refresh_task.done():
+                self._refresh_task = asyncio.create_task(self._refresh_in_background())
+            return self._token
+        return await self.refresh()
+
+    async def refresh(self) -> str:
+        """Fetch a new token unless another caller already did while we waited."""
+        async with self._lock:
+            if self._is_fresh():
+                return self._token
+            
+            if not settings.reddit_client_id or not settings.reddit_client_secret:
+                raise HTTPException(
+                    status_code=500,
+                    detail="Reddit credentials not configured. Please set REDDIT_CLIENT_ID and REDDIT_CLIENT_SECRET."
+                )
+            
+            credentials = f"{settings.reddit_client_id}:{settings.reddit_client_secret}"
+            encoded_credentials = base64.b64encode(credentials.encode()).decode()
+            
+            requested_at = time.monotonic()
+            response = await self.client.post(
+                REDDIT_TOKEN_URL,
+                headers={"Authorization": f"Basic {encoded_credentials}"},
+                data={"grant_type": "client_credentials"}
+            )
+            
+            if response.status_code != 200:
+                raise HTTPException(
+                    status_code=500,
+                    detail=f"Failed to get Reddit access token: {response.text}"
+                )
+            
+            token_data = response.json()
+            self._token = token_data["access_token"]
+            self._expires_at = requested_at + float(token_data.get("expires_in", 3600))
+            return self._token
+
+    async def _refresh_in_background(self):
+        try:
+            await self.refresh()
+        except Exception as e:
+            print(f"Background Reddit token refresh failed: {e}")
@@ -0,0 +1,24 @@
+from typing import Any
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+class ModelJSONResponse(JSONResponse):
+    """JSON response that serializes a pydantic model straight to bytes with pydantic-core.
+
+    Returning one from an endpoint skips FastAPI's response_model pass, which dumps
+    the model to dicts, validates them again and then encodes them with the json
+    module.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.model_dump_json().encode()
+        return super().render(content)
+
+def model_json_response(content: BaseModel, response: Response) -> ModelJSONResponse:
+    """Wrap content in a ModelJSONResponse, keeping headers dependencies set on the endpoint's response parameter."""
+    model_response = ModelJSONResponse(content, status_code=response.status_code or 200)
+    model_response.headers.raw.extend(response.headers.raw)
+    return model_response
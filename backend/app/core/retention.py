@@ -0,0 +1,87 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import insert, literal, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database import chunked, run_in_session, DisplayedPost, DisplayedPostArchive
+
+def get_displayed_posts_retention_cutoff() -> datetime:
+    """Displayed posts both created and displayed before this moment are pruned."""
+    return datetime.utcnow() - timedelta(days=settings.displayed_posts_retention_days)
+
+def prune_displayed_posts(db: Session, cutoff: datetime, archive: bool, batch_size: int) -> int:
+    """Delete (or move to the archive) displayed posts created and displayed before the cutoff.
+    
+    A post created before the cutoff can only turn up again in searches reaching
+    further back than the retention window, so dropping its row loses nothing for
+    shorter searches. Works in committed batches to keep write locks short. Returns
+    the number of rows pruned.
+    """
+    pruned = 0
+    while True:
+        ids = [post_id for (post_id,) in db.query(DisplayedPost.id).filter(
+            DisplayedPost.displayed_at < cutoff,
+            DisplayedPost.created_utc < cutoff,
+        ).order_by(DisplayedPost.displayed_at).limit(max(1, batch_size))]
+        if not ids:
+            return pruned
+        
+        for chunk in chunked(ids):
+            if archive:
+                db.execute(insert(DisplayedPostArchive).from_select(
+                    ["reddit_id", "title", "created_utc", "displayed_at", "archived_at"],
+                    select(
+                        DisplayedPost.reddit_id,
+                        DisplayedPost.title,
+                        DisplayedPost.created_utc,
+                        DisplayedPost.displayed_at,
+                        literal(datetime.utcnow(), DisplayedPostArchive.archived_at.type),
+                    ).where(DisplayedPost.id.in_(chunk)),
+                ))
+            db.query(DisplayedPost).filter(DisplayedPost.id.in_(chunk)).delete(synchronize_session=False)
+        db.commit()
+        pruned += len(ids)
+        if len(ids) < batch_size:
+            return pruned
+
+class RetentionJob:
+    """Prunes displayed posts beyond the retention window in the background of the running app."""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run_once(self) -> int:
+        """Prune once and return the number of rows removed."""
+        return await run_in_session(
+            prune_displayed_posts,
+            get_displayed_posts_retention_cutoff(),
+            settings.displayed_posts_archive,
+            settings.displayed_posts_prune_batch_size,
+        )
+
+    async def _run(self):
+        while True:
+            try:
+                pruned = await self.run_once()
+                if pruned:
+                    action = "Archived" if settings.displayed_posts_archive else "Pruned"
+                    print(f"{action} {pruned} displayed posts older than {settings.displayed_posts_retention_days} days")
+            except Exception as e:
+                print(f"Displayed posts retention failed: {e}")
+            await asyncio.sleep(settings.displayed_posts_retention_interval_hours * 3600)
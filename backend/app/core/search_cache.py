@@ -0,0 +1,79 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from app.core.config import settings
+from app.core.metrics import CACHE_LOOKUPS, add_request_timings, start_request_timings
+
+class SearchCache:
+    """TTL cache for crawl results with single-flight loading and stale-while-revalidate.
+
+    A fresh entry is returned as is. A stale entry, up to stale_seconds past its TTL,
+    is returned immediately while one background task reloads it. Misses wait on the
+    load, and identical concurrent misses share the same in-flight task instead of
+    each crawling Reddit. Failed loads are not cached. A load collects its own stage
+    timings, which are added to the breakdown of every request that waited on it.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: Optional[float] = None,
+        stale_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+    ):
+        self.ttl_seconds = settings.search_cache_ttl_seconds if ttl_seconds is None else ttl_seconds
+        self.stale_seconds = settings.search_cache_stale_seconds if stale_seconds is None else stale_seconds
+        self.max_entries = settings.search_cache_max_entries if max_entries is None else max_entries
+        self._entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    async def get(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value for key, loading it with loader when missing or expired."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry[0]
+            if age < self.ttl_seconds:
+                CACHE_LOOKUPS.labels("search", "hit").inc()
+                self._entries.move_to_end(key)
+                return entry[1]
+            if age < self.ttl_seconds + self.stale_seconds:
+                CACHE_LOOKUPS.labels("search", "stale").inc()
+                if key not in self._inflight:
+                    self._start_load(key, loader).add_done_callback(self._log_background_failure)
+                return entry[1]
+
+        task = self._inflight.get(key)
+        CACHE_LOOKUPS.labels("search", "miss" if task is None else "coalesced").inc()
+        if task is None:
+            task = self._start_load(key, loader)
+        # Shield the shared load so one disconnecting caller does not cancel it for the others
+        value, timings = await asyncio.shield(task)
+        add_request_timings(timings)
+        return value
+
+    def clear(self):
+        self._entries.clear()
+
+    def _start_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = asyncio.create_task(self._load(key, loader))
+        self._inflight[key] = task
+        return task
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> tuple[Any, Dict[str, float]]:
+        # The task runs in a copy of the starting request's context, so this leaves that request's timings alone
+        timings = start_request_timings()
+        try:
+            value = await loader()
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > max(0, self.max_entries):
+                self._entries.popitem(last=False)
+            return value, timings
+        finally:
+            self._inflight.pop(key, None)
+
+    @staticmethod
+    def _log_background_failure(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Background search cache refresh failed: {task.exception()}")
@@ -0,0 +1,145 @@
+import hashlib
+import math
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.dedupe import FingerprintBuckets
+from app.core.metrics import CACHE_LOOKUPS
+from app.database import DisplayedPost
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings: no false negatives, false positives at about error_rate once full."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = max(1, capacity)
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+class SeenPostIndex:
+    """In-process index of displayed post ids in front of the displayed_posts table.
+
+    Posts displayed within the window are kept with their displayed_at time, in
+    display order, so the dedup and staleness checks for hot ids need no query.
+    Entries that age out of the window move into a chain of Bloom filters, which
+    also hold every older id loaded at startup. An id in neither has never been
+    displayed; only Bloom hits have to be confirmed against the database. Recent
+    entries also keep their SimHash fingerprint for near-duplicate lookups.
+
+    The index only sees posts marked through this process, so it is loaded once at
+    startup and must be disabled when several workers share the database.
+    """
+
+    def __init__(
+        self,
+        window: timedelta,
+        bloom_capacity: Optional[int] = None,
+        bloom_error_rate: Optional[float] = None,
+    ):
+        self.window = window
+        self.bloom_capacity = settings.seen_posts_bloom_capacity if bloom_capacity is None else bloom_capacity
+        self.bloom_error_rate = settings.seen_posts_bloom_error_rate if bloom_error_rate is None else bloom_error_rate
+        self._recent: "OrderedDict[str, datetime]" = OrderedDict()
+        self._older: List[BloomFilter] = [BloomFilter(self.bloom_capacity, self.bloom_error_rate)]
+        self._fingerprints = FingerprintBuckets(settings.duplicate_max_distance)
+
+    def load(self, db: Session):
+        """Rebuild the index from displayed_posts."""
+        threshold = datetime.utcnow() - self.window
+        older_filter = or_(DisplayedPost.displayed_at < threshold, DisplayedPost.displayed_at.is_(None))
+        older_count = db.query(DisplayedPost.id).filter(older_filter).count()
+        older = BloomFilter(max(self.bloom_capacity, older_count * 2), self.bloom_error_rate)
+        for (reddit_id,) in db.query(DisplayedPost.reddit_id).filter(older_filter).yield_per(10000):
+            older.add(reddit_id)
+
+        recent = OrderedDict()
+        fingerprints = FingerprintBuckets(settings.duplicate_max_distance)
+        for reddit_id, displayed_at, simhash in (
+            db.query(DisplayedPost.reddit_id, DisplayedPost.displayed_at, DisplayedPost.simhash)
+            .filter(DisplayedPost.displayed_at >= threshold)
+            .order_by(DisplayedPost.displayed_at)
+        ):
+            recent[reddit_id] = displayed_at
+            if simhash:
+                fingerprints.add(reddit_id, simhash)
+        self._recent, self._older, self._fingerprints = recent, [older], fingerprints
+
+    def lookup(self, reddit_ids: Iterable[str]) -> tuple[Dict[str, datetime], List[str]]:
+        """Split ids into known display times and ids that must be checked against the database.
+
+        Ids in neither result have never been displayed.
+        """
+        self.evict()
+        displayed_at: Dict[str, datetime] = {}
+        unresolved: List[str] = []
+        negatives = 0
+        for reddit_id in dict.fromkeys(reddit_ids):
+            at = self._recent.get(reddit_id)
+            if at is not None:
+                displayed_at[reddit_id] = at
+            elif any(reddit_id in bloom for bloom in self._older):
+                unresolved.append(reddit_id)
+            else:
+                negatives += 1
+        CACHE_LOOKUPS.labels("seen_posts", "hit").inc(len(displayed_at))
+        CACHE_LOOKUPS.labels("seen_posts", "negative").inc(negatives)
+        CACHE_LOOKUPS.labels("seen_posts", "miss").inc(len(unresolved))
+        return displayed_at, unresolved
+
+    def add(self, reddit_ids: Iterable[str], displayed_at: datetime, fingerprints: Optional[Dict[str, int]] = None):
+        """Record posts that were just marked as displayed, with their fingerprints when known."""
+        for reddit_id in reddit_ids:
+            if reddit_id not in self._recent:
+                self._recent[reddit_id] = displayed_at
+                if fingerprints and fingerprints.get(reddit_id):
+                    self._fingerprints.add(reddit_id, fingerprints[reddit_id])
+
+    def find_near_duplicate(self, fingerprint: int, exclude: Optional[str] = None) -> Optional[str]:
+        """Return the recently displayed post closest to the fingerprint, if one is within the duplicate distance."""
+        self.evict()
+        return next((reddit_id for reddit_id in self._fingerprints.matches(fingerprint) if reddit_id != exclude), None)
+
+    def discard(self, reddit_id: str):
+        """Forget a post removed from displayed_posts; a Bloom hit for it is settled by the database."""
+        self._recent.pop(reddit_id, None)
+        self._fingerprints.remove(reddit_id)
+
+    def evict(self):
+        """Move entries displayed before the window into the Bloom filters."""
+        threshold = datetime.utcnow() - self.window
+        while self._recent:
+            reddit_id, at = next(iter(self._recent.items()))
+            if at >= threshold:
+                break
+            self._recent.popitem(last=False)
+            self._fingerprints.remove(reddit_id)
+            bloom = self._older[-1]
+            if bloom.count >= bloom.capacity:
+                # Grow by chaining a larger filter so the false positive rate stays bounded
+                bloom = BloomFilter(bloom.capacity * 2, self.bloom_error_rate)
+                self._older.append(bloom)
+            bloom.add(reddit_id)
+
+    def __len__(self) -> int:
+        return len(self._recent)
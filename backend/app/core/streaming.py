@@ -0,0 +1,7 @@
+import json
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+def ndjson_event(event: str, data: dict) -> str:
+    """Encode one streaming event as a line of newline-delimited JSON."""
+    return json.dumps({"event": event, "data": data}) + "\n"
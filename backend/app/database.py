@@ -1,18 +1,43 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Boolean, Text
+from sqlalchemy import create_engine, event, inspect, text, BigInteger, Column, Integer, String, DateTime, Boolean, Float, Text, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
+from contextlib import contextmanager
 import os
+import time
 from datetime import datetime
+from app.core.metrics import DB_SECONDS, record_stage
 
 # Database configuration
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./reddit_posts.db")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+is_sqlite = DATABASE_URL.startswith("sqlite")
+is_sqlite_memory = is_sqlite and (":memory:" in DATABASE_URL or DATABASE_URL.rstrip("/") == "sqlite:")
 
 # Create SQLAlchemy engine
 engine = create_engine(
     DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
+    connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000} if is_sqlite else {},
+    **({} if is_sqlite_memory else {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_pre_ping": not is_sqlite,
+    })
 )
 
+if is_sqlite and not is_sqlite_memory:
+    @event.listens_for(engine, "connect")
+    def _tune_sqlite(dbapi_connection, connection_record):
+        """Let readers run alongside a writer and wait on locks instead of failing."""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.close()
+
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -28,15 +53,224 @@ class DisplayedPost(Base):
     title = Column(String, nullable=False)
     created_utc = Column(DateTime, nullable=False)
     displayed_at = Column(DateTime, default=datetime.utcnow)
+    simhash = Column(BigInteger, nullable=True)  # Title and selftext fingerprint for near-duplicate checks
+    
+    # Serves newest-first keyset pages, stale counts and retention range scans
+    __table_args__ = (Index("ix_displayed_posts_displayed_at_id", "displayed_at", "id"),)
+
+class DisplayedPostArchive(Base):
+    """Displayed posts moved out of displayed_posts by the retention job."""
+    __tablename__ = "displayed_posts_archive"
+    
+    id = Column(Integer, primary_key=True)
+    reddit_id = Column(String, index=True, nullable=False)
+    title = Column(String, nullable=False)
+    created_utc = Column(DateTime, nullable=False)
+    displayed_at = Column(DateTime)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+
+class AnalysisCacheEntry(Base):
+    """Model for caching OpenAI analysis results per post, business context and model."""
+    __tablename__ = "analysis_cache"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String, unique=True, index=True, nullable=False)  # Hash of post, context, analysis type and model
+    reddit_id = Column(String, index=True, nullable=True)
+    result = Column(Text, nullable=False)  # JSON analysis returned by the model
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
 
-def get_db():
-    """Dependency to get database session."""
-    db = SessionLocal()
+class Monitor(Base):
+    """Model for a saved keyword/subreddit set that the scheduler polls on an interval."""
+    __tablename__ = "monitors"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)
+    keywords = Column(Text, nullable=False)  # JSON list
+    subreddits = Column(Text, nullable=False)  # JSON list
+    whole_word = Column(Boolean, default=False, nullable=False)
+    interval_minutes = Column(Integer, default=15, nullable=False)
+    enabled = Column(Boolean, default=True, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_run_at = Column(DateTime, nullable=True)
+
+class MonitorCursor(Base):
+    """Model for a monitor's high-water mark in one subreddit: the newest post already polled."""
+    __tablename__ = "monitor_cursors"
+    __table_args__ = (UniqueConstraint("monitor_id", "subreddit"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    monitor_id = Column(Integer, ForeignKey("monitors.id", ondelete="CASCADE"), index=True, nullable=False)
+    subreddit = Column(String, nullable=False)
+    newest_fullname = Column(String, nullable=False)  # e.g. t3_abc123
+    newest_created_utc = Column(DateTime, nullable=False)
+    previous_fullname = Column(String, nullable=True)  # The post just older than newest; polls page from it to notice when newest is removed
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class MonitorMatch(Base):
+    """Model for a post a monitor found matching its keywords."""
+    __tablename__ = "monitor_matches"
+    __table_args__ = (UniqueConstraint("monitor_id", "reddit_id"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    monitor_id = Column(Integer, ForeignKey("monitors.id", ondelete="CASCADE"), index=True, nullable=False)
+    reddit_id = Column(String, nullable=False)
+    title = Column(String, nullable=False)
+    subreddit = Column(String, nullable=False)
+    url = Column(String, nullable=False)
+    keywords = Column(Text, nullable=False)  # JSON list of matched keywords
+    score = Column(Integer, default=0)
+    num_comments = Column(Integer, default=0)
+    created_utc = Column(DateTime, nullable=False)
+    found_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+class CorpusPost(Base):
+    """Model for a fetched Reddit post kept locally so searches can be answered without Reddit."""
+    __tablename__ = "corpus_posts"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    reddit_id = Column(String, unique=True, index=True, nullable=False)
+    fullname = Column(String, nullable=True)  # e.g. t3_abc123
+    subreddit = Column(String, index=True, nullable=False)  # Lowercased, for lookups
+    subreddit_name = Column(String, nullable=False)  # As Reddit spells it
+    title = Column(String, nullable=False)
+    selftext = Column(Text, nullable=True)
+    permalink = Column(String, nullable=True)
+    score = Column(Integer, default=0)
+    num_comments = Column(Integer, default=0)
+    created_utc = Column(Float, index=True, nullable=False)  # Epoch seconds, as Reddit reports it
+    search_text = Column(Text, nullable=False)  # Normalized title and selftext, indexed by corpus_fts
+    fetched_at = Column(DateTime, default=datetime.utcnow)
+    fetched_age = Column(Float, nullable=True)  # Seconds from creation to the last fetch; younger than CORPUS_REFRESH_HOURS means counts may still change
+
+class CorpusCoverage(Base):
+    """Model for the time window of a subreddit whose posts are all in corpus_posts."""
+    __tablename__ = "corpus_coverage"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    subreddit = Column(String, unique=True, index=True, nullable=False)
+    covered_from = Column(Float, nullable=False)  # Epoch seconds
+    covered_to = Column(Float, nullable=False)  # Epoch seconds
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+# Trigram FTS5 index over corpus_posts.search_text, kept in sync by triggers
+CORPUS_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS corpus_fts USING fts5("
+    "search_text, content='corpus_posts', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS corpus_posts_ai AFTER INSERT ON corpus_posts BEGIN "
+    "INSERT INTO corpus_fts(rowid, search_text) VALUES (new.id, new.search_text); END",
+    "CREATE TRIGGER IF NOT EXISTS corpus_posts_ad AFTER DELETE ON corpus_posts BEGIN "
+    "INSERT INTO corpus_fts(corpus_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text); END",
+    "CREATE TRIGGER IF NOT EXISTS corpus_posts_au AFTER UPDATE ON corpus_posts BEGIN "
+    "INSERT INTO corpus_fts(corpus_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text); "
+    "INSERT INTO corpus_fts(rowid, search_text) VALUES (new.id, new.search_text); END",
+]
+corpus_fts_available = False
+
+LOOKUP_CHUNK_SIZE = 500  # Stays well under SQLite's bound-parameter limit
+
+def chunked(items: list, size: int = LOOKUP_CHUNK_SIZE):
+    """Yield successive slices of items for batched IN queries."""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def insert_or_ignore(db: Session, model, index_elements: list):
+    """Build a bulk INSERT that skips rows conflicting on index_elements where the dialect supports it."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        return insert(model).on_conflict_do_nothing(index_elements=index_elements)
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert(model).on_conflict_do_nothing(index_elements=index_elements)
+    return model.__table__.insert()
+
+def upsert(db: Session, model, index_elements: list, update_columns: list):
+    """Build a bulk INSERT that overwrites update_columns of rows conflicting on index_elements where the dialect supports it."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        return model.__table__.insert()
+    statement = insert(model)
+    return statement.on_conflict_do_update(
+        index_elements=index_elements,
+        set_={column: statement.excluded[column] for column in update_columns},
+    )
+
+@contextmanager
+def timed_db_helper(fn):
+    """Time a database helper call for the db_seconds histogram and the request's db stage."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        DB_SECONDS.labels(getattr(fn, "__name__", "unknown")).observe(elapsed)
+        record_stage("db", elapsed)
+
+class ThreadpoolSession:
+    """Session handle for async endpoints that runs blocking database work in the threadpool.
+    
+    Calls are awaited one at a time, so the underlying Session is never used by
+    two threads at once.
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    async def run(self, fn, *args, **kwargs):
+        """Call fn(session, *args, **kwargs) off the event loop."""
+        with timed_db_helper(fn):
+            return await run_in_threadpool(fn, self.session, *args, **kwargs)
+
+    async def close(self):
+        await run_in_threadpool(self.session.close)
+
+async def get_db():
+    """Dependency to get a database session that does not block the event loop."""
+    db = ThreadpoolSession(SessionLocal())
     try:
         yield db
     finally:
-        db.close()
+        await db.close()
+
+async def run_in_session(fn, *args, **kwargs):
+    """Call fn(session, *args, **kwargs) in the threadpool with a short-lived session of its own.
+    
+    For work started from concurrent tasks, which must not share one Session.
+    """
+    def call():
+        with SessionLocal() as session:
+            return fn(session, *args, **kwargs)
+    with timed_db_helper(fn):
+        return await run_in_threadpool(call)
 
 def init_db():
     """Initialize database tables."""
+    global corpus_fts_available
     Base.metadata.create_all(bind=engine)
+    
+    # create_all skips existing tables, so add nullable columns and indexes introduced since a table was created
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing_columns and column.nullable:
+                with engine.begin() as connection:
+                    connection.execute(text(
+                        f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(engine.dialect)}"
+                    ))
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    
+    if is_sqlite:
+        try:
+            with engine.begin() as connection:
+                for statement in CORPUS_FTS_DDL:
+                    connection.execute(text(statement))
+            corpus_fts_available = True
+        except Exception as e:
+            # Older SQLite builds lack FTS5 trigram; the corpus then scans its time window instead
+            print(f"Corpus full-text index unavailable: {e}")
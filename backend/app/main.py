@@ -1,15 +1,21 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response
 from contextlib import asynccontextmanager
 import os
+from datetime import timedelta
 from dotenv import load_dotenv
 
-from app.api import reddit, analysis, docs
+from app.api import reddit, analysis, docs, monitors, admin
 import certifi
 from app.core.config import settings
-from app.database import init_db
+from app.core.metrics import METRICS_MEDIA_TYPE, render_metrics
+from app.core.retention import RetentionJob
+from app.core.reddit_client import REDDIT_API_BASE, RedditTokenManager, create_reddit_client
+from app.core.search_cache import SearchCache
+from app.core.seen_posts import SeenPostIndex
+from app.database import init_db, run_in_session
 
 load_dotenv()
 
@@ -31,26 +37,50 @@ async def lifespan(app: FastAPI):
     except Exception:
         pass
 
-    # Create shared Reddit client if credentials are configured
+    # Create shared Reddit client and token cache; all Reddit traffic reuses this connection pool
     app.state.reddit_client = None
+    app.state.reddit_tokens = None
     try:
-        if settings.reddit_client_id and settings.reddit_client_secret:
-            import httpx
-            
-            # Create httpx client with SSL verification disabled
-            app.state.reddit_client = httpx.AsyncClient(
-                verify=False,
-                timeout=30.0,
-                headers={
-                    "User-Agent": settings.reddit_user_agent or "RedditAgent/1.0"
-                }
-            )
+        app.state.reddit_client = create_reddit_client()
+        app.state.reddit_tokens = RedditTokenManager(app.state.reddit_client)
     except Exception as e:
         print(f"Failed to initialize shared Reddit client: {e}")
 
+    if settings.profiling_enabled and not settings.profiling_token:
+        print("Profiling is enabled but PROFILING_TOKEN is not set; requests will not be profiled")
+
+    # Share crawl results between identical searches
+    app.state.search_cache = SearchCache()
+
+    # Keep recently displayed post ids in memory so dedup checks skip the database
+    app.state.seen_posts = None
+    if settings.seen_posts_index_enabled:
+        try:
+            seen_posts = SeenPostIndex(timedelta(hours=reddit.STALE_THRESHOLD_HOURS))
+            await run_in_session(seen_posts.load)
+            app.state.seen_posts = seen_posts
+        except Exception as e:
+            print(f"Failed to load seen-post index: {e}")
+
+    # Start polling saved monitors in the background
+    app.state.monitor_scheduler = None
+    if settings.monitor_scheduler_enabled:
+        app.state.monitor_scheduler = monitors.MonitorScheduler(app)
+        app.state.monitor_scheduler.start()
+
+    # Prune displayed posts beyond the retention window in the background
+    app.state.retention_job = None
+    if settings.displayed_posts_retention_days > 0:
+        app.state.retention_job = RetentionJob()
+        app.state.retention_job.start()
+
     yield
     # Shutdown
     try:
+        if app.state.monitor_scheduler is not None:
+            await app.state.monitor_scheduler.stop()
+        if app.state.retention_job is not None:
+            await app.state.retention_job.stop()
         if getattr(app.state, "reddit_client", None) is not None:
             try:
                 await app.state.reddit_client.aclose()
@@ -88,6 +118,8 @@ if os.path.exists(static_dir):
 app.include_router(reddit.router, prefix="/api/reddit", tags=["reddit"])
 app.include_router(analysis.router, prefix="/api/analysis", tags=["analysis"])
 app.include_router(docs.router, prefix="/api/docs", tags=["docs"])
+app.include_router(monitors.router, prefix="/api/monitors", tags=["monitors"])
+app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
 
 @app.get("/")
 async def root():
@@ -102,6 +134,11 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics")
+async def metrics():
+    """Expose request stage latencies and counters in the Prometheus text format."""
+    return Response(content=render_metrics(), headers={"Content-Type": METRICS_MEDIA_TYPE})
+
 # Catch-all route for frontend routing (must be last)
 @app.get("/{full_path:path}")
 async def serve_frontend(full_path: str):
@@ -137,34 +174,15 @@ async def initialize_services():
         # Test Reddit API
         try:
             if settings.reddit_client_id and settings.reddit_client_secret:
-                import httpx
-                import base64
+                access_token = await reddit.get_reddit_access_token(app)
                 
-                # Get Reddit access token
-                credentials = f"{settings.reddit_client_id}:{settings.reddit_client_secret}"
-                encoded_credentials = base64.b64encode(credentials.encode()).decode()
-                
-                async with httpx.AsyncClient(verify=False) as client:
-                    # Get access token
-                    token_response = await client.post(
-                        "https://www.reddit.com/api/v1/access_token",
-                        headers={
-                            "Authorization": f"Basic {encoded_credentials}",
-                            "User-Agent": settings.reddit_user_agent or "RedditAgent/1.0 by /u/yourusername"
-                        },
-                        data={"grant_type": "client_credentials"}
-                    )
-                    token_response.raise_for_status()
-                    token_data = token_response.json()
-                    access_token = token_data["access_token"]
-                    
-                    # Test with authenticated Reddit API call
-                    headers = {
-                        "Authorization": f"Bearer {access_token}",
-                        "User-Agent": settings.reddit_user_agent or "RedditAgent/1.0 by /u/yourusername"
-                    }
-                    response = await client.get("https://oauth.reddit.com/r/Python/hot", params={"limit": 1}, headers=headers)
-                    response.raise_for_status()
+                # Test with authenticated Reddit API call over the shared client
+                response = await app.state.reddit_client.get(
+                    f"{REDDIT_API_BASE}/r/Python/hot",
+                    params={"limit": 1},
+                    headers=reddit.reddit_auth_headers(access_token),
+                )
+                response.raise_for_status()
                 results["reddit"] = {"status": "success", "message": "Reddit API connected"}
             else:
                 results["reddit"] = {"status": "warning", "message": "Reddit credentials not configured"}
@@ -174,11 +192,10 @@ async def initialize_services():
         # Test OpenAI API
         try:
             if settings.openai_api_key:
-                from openai import OpenAI
-                client = OpenAI(api_key=settings.openai_api_key)
+                client = analysis.get_openai_client()
                 # minimal call to validate key without heavy usage
-                client.chat.completions.create(
-                    model="gpt-3.5-turbo",
+                await client.chat.completions.create(
+                    model=settings.openai_model,
                     messages=[{"role": "user", "content": "ping"}],
                     max_tokens=1,
                 )
@@ -0,0 +1,38 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+class MonitorCreate(BaseModel):
+    name: str
+    keywords: List[str]
+    subreddits: List[str]
+    whole_word: bool = False
+    interval_minutes: int = 15
+    enabled: bool = True
+
+class MonitorOut(BaseModel):
+    id: int
+    name: str
+    keywords: List[str]
+    subreddits: List[str]
+    whole_word: bool
+    interval_minutes: int
+    enabled: bool
+    created_at: str
+    last_run_at: Optional[str] = None
+
+class MonitorMatchOut(BaseModel):
+    reddit_id: str
+    title: str
+    subreddit: str
+    url: str
+    keywords: List[str]
+    score: int
+    num_comments: int
+    created: str
+    found_at: str
+
+class MonitorRunResult(BaseModel):
+    monitor_id: int
+    new_matches: int
+    posts_scanned: int
+    requests: int
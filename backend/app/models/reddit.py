@@ -1,7 +1,26 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
+class DuplicatePost(BaseModel):
+    """A near-duplicate or cross-post shown under its representative."""
+    title: str
+    subreddit: str
+    url: str
+    score: int
+    num_comments: int
+    reddit_id: Optional[str] = None
+
+class MatchedComment(BaseModel):
+    """A comment whose body matched the search keywords."""
+    comment_id: str
+    author: Optional[str] = None
+    body: str
+    url: str
+    score: int
+    created: str
+    keywords: List[str]
+
 class RedditPost(BaseModel):
     title: str
     subreddit: str
@@ -13,11 +32,19 @@ class RedditPost(BaseModel):
     num_comments: int
     reddit_id: Optional[str] = None  # Reddit post ID for tracking
     is_stale: Optional[bool] = False 
+    duplicates: List[DuplicatePost] = []  # Near-duplicates and cross-posts collapsed into this post
+    duplicate_of: Optional[str] = None  # Earlier post this one near-duplicates: recently displayed, or streamed before it
+    matched_comments: List[MatchedComment] = []  # Comments matching the keywords, when comments were scanned
 
 class SearchRequest(BaseModel):
     keywords: List[str]
     subreddits: List[str]
     days_back: int = 30
+    whole_word: bool = False  # Match keywords on word boundaries; "quoted" keywords always do
+    include_timings: bool = False  # Add a per-stage timing breakdown to the response
+    collapse_duplicates: bool = True  # Nest near-duplicates and cross-posts under one representative
+    scan_comments: bool = False  # Also match keywords against comment threads of posts in the window
+    comment_budget: Optional[int] = None  # Comment requests for this search, at most comment_scan_request_budget
 
 class SearchResponse(BaseModel):
     posts: List[RedditPost]
@@ -25,6 +52,13 @@ class SearchResponse(BaseModel):
     unique_subreddits: int
     search_time: float
     new_posts: int  # Number of posts not previously displayed
+    truncated_subreddits: List[str] = []  # Subreddits whose page budget ran out before days_back was covered
+    failed_subreddits: List[str] = []  # Subreddits whose listing failed after retries; their matches may be incomplete
+    collapsed_posts: int = 0  # Posts nested under a representative; when streaming, posts marked duplicate_of
+    matched_comments: int = 0  # Comments matching the keywords across all posts
+    comment_requests: int = 0  # Requests the comment scan made
+    comment_scan_truncated: bool = False  # The comment budget ran out before every candidate thread was scanned
+    timings: Optional[Dict[str, float]] = None  # Seconds per stage, summed over concurrent work, when requested
 
 class BusinessContext(BaseModel):
     company_type: str
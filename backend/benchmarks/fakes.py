@@ -0,0 +1,186 @@
+import asyncio
+import json
+import random
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, List
+
+import httpx
+
+# Syllable pairs give a vocabulary of 1,600 words, wide enough that independently
+# drawn posts are far apart by SimHash and only the planted near-duplicates collapse
+SYLLABLES = "ba be bi bo bu da de di do du ka ke ki ko ku la le li lo lu ma me mi mo mu na ne ni no nu ra re ri ro ru sa se si so su".split()
+VOCABULARY = [first + second for first in SYLLABLES for second in SYLLABLES]
+
+@dataclass
+class FakeRedditConfig:
+    posts_per_subreddit: int = 500
+    post_interval_seconds: float = 600.0  # Gap between consecutive posts in a subreddit
+    keyword: str = "python"
+    keyword_density: float = 0.1  # Share of posts whose title contains the keyword
+    selftext_words: int = 60
+    duplicate_rate: float = 0.05  # Share of posts that repeat an earlier post's text with one word changed
+    latency: float = 0.05  # Seconds per listing request
+    rate_limit_every: int = 0  # Answer every Nth listing request with a 429; 0 disables
+    ratelimit_remaining: float = 100000.0  # Reported in X-Ratelimit-Remaining
+    ratelimit_reset: float = 600.0  # Reported in X-Ratelimit-Reset
+
+class FakeReddit:
+    """In-process stand-in for Reddit's OAuth token endpoint and /r/{sub}/new listings.
+
+    Posts are generated deterministically per subreddit, newest first, and combined
+    r/a+b listings merge them by creation time like Reddit does. Honours limit,
+    after and before.
+    """
+
+    def __init__(self, config: FakeRedditConfig):
+        self.config = config
+        self.now = time.time()
+        self.calls: Dict[str, int] = {"token": 0, "listing": 0, "rate_limited": 0}
+        self._posts: Dict[str, List[dict]] = {}
+        self._listings: Dict[str, tuple[List[dict], Dict[str, int]]] = {}
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    def get_posts(self, subreddit: str) -> List[dict]:
+        posts = self._posts.get(subreddit)
+        if posts is None:
+            rng = random.Random(subreddit)
+            posts = []
+            for i in range(self.config.posts_per_subreddit):
+                if posts and rng.random() < self.config.duplicate_rate:
+                    # A near-duplicate of an earlier post: same title, one word of the text changed
+                    original = rng.choice(posts)
+                    title = original["title"]
+                    words = original["selftext"].split()
+                    if words:
+                        words[rng.randrange(len(words))] = rng.choice(VOCABULARY)
+                    selftext = " ".join(words)
+                else:
+                    has_keyword = rng.random() < self.config.keyword_density
+                    title = " ".join(rng.choice(VOCABULARY) for _ in range(6)).capitalize()
+                    title += f" about {self.config.keyword}" if has_keyword else ""
+                    selftext = " ".join(rng.choice(VOCABULARY) for _ in range(self.config.selftext_words))
+                posts.append({
+                    "id": f"{subreddit}_{i}",
+                    "name": f"t3_{subreddit}_{i}",
+                    "title": title,
+                    "selftext": selftext,
+                    "subreddit": subreddit,
+                    "permalink": f"/r/{subreddit}/comments/{subreddit}_{i}/",
+                    "created_utc": self.now - i * self.config.post_interval_seconds,
+                    "score": rng.randint(0, 500),
+                    "num_comments": rng.randint(0, 80),
+                })
+            self._posts[subreddit] = posts
+        return posts
+
+    def get_listing(self, path_name: str) -> tuple[List[dict], Dict[str, int]]:
+        """Return the newest-first posts of r/{path_name} and each post's position by fullname."""
+        listing = self._listings.get(path_name)
+        if listing is None:
+            subreddits = path_name.split("+")
+            posts = sorted(
+                (post for subreddit in subreddits for post in self.get_posts(subreddit)),
+                key=lambda post: -post["created_utc"],
+            )
+            listing = (posts, {post["name"]: i for i, post in enumerate(posts)})
+            self._listings[path_name] = listing
+        return listing
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/api/v1/access_token":
+            self.calls["token"] += 1
+            return httpx.Response(200, json={"access_token": "bench-token", "expires_in": 3600})
+
+        parts = request.url.path.strip("/").split("/")
+        if len(parts) < 3 or parts[0] != "r":
+            return httpx.Response(404, json={"error": 404})
+
+        self.calls["listing"] += 1
+        await asyncio.sleep(self.config.latency)
+        if self.config.rate_limit_every and self.calls["listing"] % self.config.rate_limit_every == 0:
+            self.calls["rate_limited"] += 1
+            return httpx.Response(429, headers={"retry-after": "0.1"}, json={"error": 429})
+
+        posts, positions = self.get_listing(parts[1])
+        limit = int(request.url.params.get("limit", 25))
+        after = request.url.params.get("after")
+        before = request.url.params.get("before")
+        if before:
+            start = max(0, positions.get(before, 0) - limit)
+            page = posts[start:positions.get(before, 0)]
+        else:
+            start = positions[after] + 1 if after in positions else 0
+            page = posts[start:start + limit]
+
+        has_more = bool(page) and start + limit < len(posts)
+        return httpx.Response(
+            200,
+            json={"data": {
+                "children": [{"kind": "t3", "data": post} for post in page],
+                "after": page[-1]["name"] if has_more else None,
+            }},
+            headers={
+                "x-ratelimit-remaining": str(self.config.ratelimit_remaining),
+                "x-ratelimit-reset": str(self.config.ratelimit_reset),
+                "x-ratelimit-used": "1",
+            },
+        )
+
+@dataclass
+class FakeOpenAIConfig:
+    latency: float = 0.3  # Seconds per chat completion
+    rate_limit_every: int = 0  # Answer every Nth completion with a 429; 0 disables
+
+class FakeOpenAI:
+    """In-process stand-in for the OpenAI chat-completions endpoint.
+
+    Answers single-post prompts with one JSON object and batched prompts with a
+    JSON array covering every POST [id] in the prompt.
+    """
+
+    def __init__(self, config: FakeOpenAIConfig):
+        self.config = config
+        self.calls: Dict[str, int] = {"completion": 0, "rate_limited": 0}
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.calls["completion"] += 1
+        await asyncio.sleep(self.config.latency)
+        if self.config.rate_limit_every and self.calls["completion"] % self.config.rate_limit_every == 0:
+            self.calls["rate_limited"] += 1
+            return httpx.Response(
+                429,
+                headers={"retry-after-ms": "100", "x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "100ms"},
+                json={"error": {"message": "Rate limit reached", "type": "requests"}},
+            )
+
+        body = json.loads(request.content)
+        prompt = body["messages"][-1]["content"]
+        analysis = {
+            "content_type": "discussion",
+            "target_audience_match": 50,
+            "reasoning": "benchmark",
+            "business_opportunity": "benchmark",
+        }
+        ids = re.findall(r"POST \[(\d+)\]", prompt)
+        if ids:
+            content = json.dumps([
+                {"id": int(post_id), "relevance_score": (len(prompt) + int(post_id) * 7) % 101, **analysis}
+                for post_id in ids
+            ])
+        else:
+            content = json.dumps({"relevance_score": len(prompt) % 101, **analysis})
+        return httpx.Response(200, json={
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-3.5-turbo"),
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": 50, "total_tokens": len(prompt) // 4 + 50},
+        })
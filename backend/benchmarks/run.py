@@ -0,0 +1,328 @@
+"""Offline benchmarks for the search, analysis and displayed-posts endpoints.
+
+Runs the FastAPI app in-process against fake Reddit and OpenAI backends, so no
+credentials or network access are needed. From the backend directory:
+
+    python -m benchmarks.run --scales small,medium --output bench.json
+    python -m benchmarks.run --compare bench.json
+
+Results are printed as a table and, with --output, written as JSON so two runs
+can be compared with --compare.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, List, Optional
+
+import httpx
+
+from benchmarks.fakes import FakeOpenAI, FakeOpenAIConfig, FakeReddit, FakeRedditConfig
+
+@dataclass
+class Scale:
+    subreddits: int
+    posts_per_subreddit: int
+    analysis_posts: int
+    displayed_posts: int
+
+SCALES = {
+    "small": Scale(subreddits=3, posts_per_subreddit=300, analysis_posts=10, displayed_posts=1_000),
+    "medium": Scale(subreddits=10, posts_per_subreddit=1_000, analysis_posts=50, displayed_posts=10_000),
+    "large": Scale(subreddits=30, posts_per_subreddit=2_500, analysis_posts=200, displayed_posts=100_000),
+}
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+async def measure(
+    name: str,
+    scale_name: str,
+    iterations: int,
+    concurrency: int,
+    send: Callable[[int], Awaitable[httpx.Response]],
+) -> dict:
+    """Issue iterations requests, concurrency at a time, and summarize their latencies."""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    latencies: List[float] = []
+    errors = 0
+
+    async def one(i: int):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            response = await send(i)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors += 1
+                print(f"  {name} request {i} failed with {response.status_code}: {response.text[:200]}", file=sys.stderr)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(iterations)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "scenario": name,
+        "scale": scale_name,
+        "requests": iterations,
+        "concurrency": concurrency,
+        "errors": errors,
+        "seconds": round(elapsed, 4),
+        "throughput_rps": round(iterations / elapsed, 3) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+    }
+
+def reset_database():
+    from app.database import Base, engine
+
+    with engine.begin() as connection:
+        for table in reversed(Base.metadata.sorted_tables):
+            connection.execute(table.delete())
+
+def seed_displayed_posts(count: int):
+    from app.api.reddit import mark_posts_as_displayed
+    from app.database import SessionLocal
+
+    now = datetime.utcnow()
+    rows = [
+        {"reddit_id": f"seed_{i}", "title": f"Seeded post {i}", "created_utc": now}
+        for i in range(count)
+    ]
+    with SessionLocal() as session:
+        mark_posts_as_displayed(session, rows)
+
+def analysis_posts(fake_reddit: FakeReddit, scale: Scale) -> List[dict]:
+    """Build analysis request posts from the fake subreddits' listings."""
+    posts = []
+    subreddit = 0
+    while len(posts) < scale.analysis_posts:
+        for post in fake_reddit.get_posts(f"bench{subreddit % scale.subreddits}")[subreddit // scale.subreddits::7]:
+            if len(posts) >= scale.analysis_posts:
+                break
+            posts.append({
+                "title": post["title"],
+                "subreddit": post["subreddit"],
+                "url": f"https://reddit.com{post['permalink']}",
+                "created": datetime.fromtimestamp(post["created_utc"]).strftime("%Y-%m-%d %H:%M:%S"),
+                "keywords": [fake_reddit.config.keyword],
+                "selftext": post["selftext"][:200],
+                "score": post["score"],
+                "num_comments": post["num_comments"],
+                "reddit_id": post["id"],
+            })
+        subreddit += 1
+    return posts
+
+async def run_scale(app, args, scale_name: str, scale: Scale) -> List[dict]:
+    """Point the app at fresh fakes sized for the scale and run every scenario against it."""
+    from openai import AsyncOpenAI
+    from app.api import analysis
+    from app.core import listing_planner
+    from app.core.config import settings
+    from app.core.reddit_client import RedditClient, RedditTokenManager
+
+    reset_database()
+    listing_planner._post_rates.clear()
+
+    fake_reddit = FakeReddit(FakeRedditConfig(
+        posts_per_subreddit=scale.posts_per_subreddit,
+        keyword_density=args.keyword_density,
+        duplicate_rate=args.duplicate_rate,
+        latency=args.reddit_latency,
+        rate_limit_every=args.reddit_429_every,
+    ))
+    fake_openai = FakeOpenAI(FakeOpenAIConfig(latency=args.openai_latency, rate_limit_every=args.openai_429_every))
+
+    if app.state.reddit_client is not None:
+        await app.state.reddit_client.aclose()
+    app.state.reddit_client = RedditClient(transport=fake_reddit.transport(), timeout=30.0)
+    app.state.reddit_tokens = RedditTokenManager(app.state.reddit_client)
+    if app.state.search_cache is not None:
+        app.state.search_cache.clear()
+    analysis._openai_client = AsyncOpenAI(
+        api_key=settings.openai_api_key,
+        max_retries=0,
+        http_client=httpx.AsyncClient(transport=fake_openai.transport()),
+    )
+
+    subreddits = [f"bench{i}" for i in range(scale.subreddits)]
+    posts = analysis_posts(fake_reddit, scale)
+    business_context = {
+        "company_type": "software agency",
+        "specialty": "python backends",
+        "blog_focus": "engineering",
+        "target_audience": "developers",
+        "interests": ["performance", "apis"],
+    }
+    results = []
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+        def search(i: int):
+            # A distinct second keyword per request keeps identical-search coalescing out of the numbers
+            keywords = [fake_reddit.config.keyword] if args.warm else [fake_reddit.config.keyword, f"nomatch{i}"]
+            return client.post("/api/reddit/search", json={
+                "keywords": keywords,
+                "subreddits": subreddits,
+                "days_back": args.days_back,
+            })
+
+        def analyze(batched: bool):
+            def send(i: int):
+                # A per-request specialty keeps the analysis cache cold unless --warm is given
+                context = business_context if args.warm else {**business_context, "specialty": f"python backends {batched} {i}"}
+                return client.post("/api/analysis/analyze", json={
+                    "posts": posts,
+                    "business_context": context,
+                    "analysis_type": "detailed",
+                    "batched": batched,
+                })
+            return send
+
+        scenarios = {
+            "search": search,
+            "analyze": analyze(False),
+            "analyze_batched": analyze(True),
+            "displayed_posts": lambda i: client.get("/api/reddit/displayed-posts", params={"limit": 50}),
+            "displayed_posts_stats": lambda i: client.get("/api/reddit/displayed-posts/stats"),
+        }
+        for name in args.scenarios:
+            if name.startswith("displayed_posts"):
+                reset_database()
+                seed_displayed_posts(scale.displayed_posts)
+            reddit_calls = dict(fake_reddit.calls)
+            openai_calls = dict(fake_openai.calls)
+
+            result = await measure(name, scale_name, args.iterations, args.concurrency, scenarios[name])
+            result["upstream"] = {
+                "reddit_listings": fake_reddit.calls["listing"] - reddit_calls["listing"],
+                "reddit_429s": fake_reddit.calls["rate_limited"] - reddit_calls["rate_limited"],
+                "openai_completions": fake_openai.calls["completion"] - openai_calls["completion"],
+                "openai_429s": fake_openai.calls["rate_limited"] - openai_calls["rate_limited"],
+            }
+            results.append(result)
+            print_result(result)
+
+    await analysis._openai_client.close()
+    return results
+
+def print_result(result: dict):
+    upstream = result["upstream"]
+    print(
+        f"{result['scale']:<7} {result['scenario']:<22} "
+        f"{result['throughput_rps']:>9.2f} req/s  p50 {result['p50_ms']:>9.1f} ms  p95 {result['p95_ms']:>9.1f} ms  "
+        f"errors {result['errors']:<3} reddit {upstream['reddit_listings']:<5} openai {upstream['openai_completions']}"
+    )
+
+def print_comparison(results: List[dict], baseline_path: str):
+    """Print throughput and latency changes against a previous --output file."""
+    with open(baseline_path) as f:
+        baseline = {(r["scale"], r["scenario"]): r for r in json.load(f)["results"]}
+
+    print(f"\nCompared with {baseline_path}:")
+    for result in results:
+        before = baseline.get((result["scale"], result["scenario"]))
+        if before is None:
+            continue
+        changes = []
+        for metric in ("throughput_rps", "p50_ms", "p95_ms"):
+            if before[metric]:
+                changes.append(f"{metric} {100 * (result[metric] - before[metric]) / before[metric]:+.1f}%")
+        print(f"{result['scale']:<7} {result['scenario']:<22} " + "  ".join(changes))
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", default="small,medium", help=f"Comma-separated subset of {', '.join(SCALES)}")
+    parser.add_argument(
+        "--scenarios",
+        default="search,analyze,analyze_batched,displayed_posts,displayed_posts_stats",
+        help="Comma-separated scenarios to run",
+    )
+    parser.add_argument("--iterations", type=int, default=20, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=4, help="Requests in flight at once")
+    parser.add_argument("--days-back", type=int, default=7, help="days_back sent with each search")
+    parser.add_argument("--keyword-density", type=float, default=0.1, help="Share of fake posts that match")
+    parser.add_argument("--duplicate-rate", type=float, default=0.05, help="Share of fake posts that near-duplicate an earlier one")
+    parser.add_argument("--reddit-latency", type=float, default=0.05, help="Seconds per fake listing request")
+    parser.add_argument("--openai-latency", type=float, default=0.3, help="Seconds per fake completion")
+    parser.add_argument("--reddit-429-every", type=int, default=0, help="Fail every Nth listing request with a 429")
+    parser.add_argument("--openai-429-every", type=int, default=0, help="Fail every Nth completion with a 429")
+    parser.add_argument("--warm", action="store_true", help="Keep the search, corpus and analysis caches in play")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--compare", help="Compare against a previous --output file")
+    args = parser.parse_args(argv)
+    args.scales = [name for name in args.scales.split(",") if name]
+    args.scenarios = [name for name in args.scenarios.split(",") if name]
+    for name in args.scales:
+        if name not in SCALES:
+            parser.error(f"unknown scale {name!r}")
+    return args
+
+async def run(args: argparse.Namespace) -> List[dict]:
+    from app.core.config import settings
+
+    # Fake credentials and no background work; caches stay cold unless --warm is given
+    settings.reddit_client_id = "bench"
+    settings.reddit_client_secret = "bench"
+    settings.openai_api_key = "bench"
+    settings.monitor_scheduler_enabled = False
+    if not args.warm:
+        settings.search_cache_ttl_seconds = 0
+        settings.search_cache_stale_seconds = 0
+        settings.corpus_enabled = False
+
+    from app.main import app
+
+    results = []
+    async with app.router.lifespan_context(app):
+        for scale_name in args.scales:
+            results.extend(await run_scale(app, args, scale_name, SCALES[scale_name]))
+    return results
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+
+    # Benchmark against a throwaway database; must be set before the app is imported
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        results = asyncio.run(run(args))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "meta": {
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                    "git_revision": git_revision(),
+                    "python": platform.python_version(),
+                    "scales": {name: asdict(SCALES[name]) for name in args.scales},
+                    "args": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+                },
+                "results": results,
+            }, f, indent=2)
+        print(f"\nWrote {args.output}")
+    if args.compare:
+        print_comparison(results, args.compare)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Microbenchmark of building and serializing search and analysis responses.
+
+Times the per-post cost of turning matched listing items into a /search response
+body and of turning those posts into an /analyze response body, once through
+the previous path (strftime, model_dump copies, FastAPI's response_model pass
+and the json module) and once through the current one (isoformat timestamps,
+no model_dump copies and ModelJSONResponse). From the backend directory:
+
+    python -m benchmarks.serialization --posts 5000
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.api.analysis import AnalysisResponse, AnalyzedPost, build_analyzed_post
+from app.api.reddit import build_reddit_posts
+from app.core.responses import ModelJSONResponse
+from app.models.reddit import RedditPost, SearchResponse
+from benchmarks.fakes import FakeReddit, FakeRedditConfig
+
+ANALYSIS = {
+    "relevance_score": 72,
+    "content_type": "discussion",
+    "target_audience_match": 60,
+    "reasoning": "benchmark",
+    "business_opportunity": "benchmark",
+}
+
+def build_posts_previous(found: List[tuple[dict, List[str]]], subreddit_name: str) -> List[RedditPost]:
+    """The per-post construction used before the fast path."""
+    results = []
+    for post, matched_keywords in found:
+        created_utc = datetime.fromtimestamp(post.get("created_utc", 0))
+        results.append(RedditPost(
+            title=post.get("title", ""),
+            subreddit=post.get("subreddit", subreddit_name),
+            url=f"https://reddit.com{post.get('permalink', '')}",
+            created=created_utc.strftime("%Y-%m-%d %H:%M:%S"),
+            keywords=matched_keywords,
+            selftext=(post.get("selftext", "")[:200] + "...") if len(post.get("selftext", "")) > 200 else post.get("selftext", ""),
+            score=post.get("score", 0),
+            num_comments=post.get("num_comments", 0),
+            reddit_id=post.get("id", ""),
+            is_stale=False
+        ))
+    return results
+
+def analyze_previous(posts: List[RedditPost]) -> List[AnalyzedPost]:
+    return [AnalyzedPost(**post.model_dump(), **ANALYSIS) for post in posts]
+
+def search_response(posts: List[RedditPost]) -> SearchResponse:
+    return SearchResponse(posts=posts, total_posts=len(posts), unique_subreddits=1, search_time=0.0, new_posts=0)
+
+def analysis_response(posts: List[AnalyzedPost]) -> AnalysisResponse:
+    return AnalysisResponse(analyzed_posts=posts, total_analyzed=len(posts), high_relevance_count=0, average_relevance=0.0)
+
+def render_previous(content, response_model) -> bytes:
+    """Serialize the way FastAPI does for a returned model: dump, validate against response_model, encode."""
+    field = create_response_field(name=f"Response_{response_model.__name__}", type_=response_model)
+    serialized = asyncio.run(serialize_response(field=field, response_content=content, is_coroutine=True))
+    return JSONResponse(serialized).body
+
+def render_current(content) -> bytes:
+    return ModelJSONResponse(content).body
+
+def best_of(repeat: int, fn: Callable[[], object]) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=5000, help="Posts per response")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement; the fastest is reported")
+    args = parser.parse_args(argv)
+
+    reddit = FakeReddit(FakeRedditConfig(posts_per_subreddit=args.posts, selftext_words=80))
+    found = [(post, ["python"]) for post in reddit.get_posts("bench")]
+    posts = build_posts_previous(found, "bench")
+    # Mark every post as displayed so neither path queues inserts
+    displayed_at = {post["id"]: datetime.utcnow() for post, _ in found}
+    analyzed = analyze_previous(posts)
+
+    stages = {
+        "build search posts": (
+            lambda: build_posts_previous(found, "bench"),
+            lambda: build_reddit_posts("bench", found, displayed_at, datetime.min, {}),
+        ),
+        "render search response": (
+            lambda: render_previous(search_response(posts), SearchResponse),
+            lambda: render_current(search_response(posts)),
+        ),
+        "build analyzed posts": (
+            lambda: analyze_previous(posts),
+            lambda: [build_analyzed_post(post, ANALYSIS, "detailed") for post in posts],
+        ),
+        "render analysis response": (
+            lambda: render_previous(analysis_response(analyzed), AnalysisResponse),
+            lambda: render_current(analysis_response(analyzed)),
+        ),
+    }
+
+    print(f"{'stage':<26} {'previous us/post':>17} {'current us/post':>16} {'speedup':>8}")
+    for name, (previous, current) in stages.items():
+        previous_seconds = best_of(args.repeat, previous)
+        current_seconds = best_of(args.repeat, current)
+        print(
+            f"{name:<26} {previous_seconds / args.posts * 1e6:>17.2f} {current_seconds / args.posts * 1e6:>16.2f}"
+            f" {previous_seconds / current_seconds:>7.1f}x"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+from app.api.analysis import ANSWER_TOKENS_PER_POST, BATCH_ANSWER_OVERHEAD, plan_batches
+from app.core.config import settings
+from app.models.reddit import RedditPost
+
+def make_posts(count: int, selftext: str = "") -> list:
+    return [
+        RedditPost(
+            title=f"Post {i}",
+            subreddit="test",
+            url=f"https://reddit.com/r/test/{i}",
+            created="2024-01-01T00:00:00",
+            keywords=["test"],
+            selftext=selftext,
+            score=1,
+            num_comments=0,
+        )
+        for i in range(count)
+    ]
+
+def test_batches_fit_completion_limit():
+    """No planned batch reserves more answer tokens than the model can complete."""
+    for analysis_type, per_post_output in ANSWER_TOKENS_PER_POST.items():
+        for posts in (make_posts(100), make_posts(100, "long body " * 50)):
+            batches = plan_batches(posts, "context", analysis_type)
+            assert sorted(i for batch in batches for i in batch) == list(range(len(posts)))
+            for batch in batches:
+                assert per_post_output * len(batch) + BATCH_ANSWER_OVERHEAD <= settings.openai_max_completion_tokens
+
+def test_short_detailed_posts_are_capped(monkeypatch):
+    """Short detailed posts would fit the prompt budget many times over; the completion limit caps them."""
+    monkeypatch.setattr(settings, "openai_max_completion_tokens", 4096)
+    batches = plan_batches(make_posts(40), "context", "detailed")
+    assert max(len(batch) for batch in batches) == (4096 - BATCH_ANSWER_OVERHEAD) // ANSWER_TOKENS_PER_POST["detailed"]